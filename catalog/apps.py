@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 
 class CatalogConfig(AppConfig):
     name = 'catalog'
     verbose_name = _('catalog')
+
+    def ready(self):
+        from catalog.models import renew_display_version
+        post_save.connect(
+            renew_display_version, dispatch_uid='catalog_renew_display_version_on_save',
+        )
+        post_delete.connect(
+            renew_display_version, dispatch_uid='catalog_renew_display_version_on_delete',
+        )
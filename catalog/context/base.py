@@ -1,9 +1,28 @@
 import abc
 
+from django.core.cache import cache
+
 from catalog import typing
+from pages import display
+from pages.cache import display_version, get_timeout
 from pages.context import Context
 
 
+def tags_cache_key(tags: typing.Iterable) -> str:
+    """Identify the tags set for the rendered page fields cache."""
+    return '-'.join(map(str, sorted(tag.id for tag in tags)))
+
+
+def tags_title(tags: typing.QuerySet) -> str:
+    """Return the tags title. It's cached, so cached views skip the tag groups query."""
+    key = display_version.key('tags_title', tags_cache_key(tags))
+    title = cache.get(key)
+    if title is None:
+        title = tags.as_title()
+        cache.set(key, title, get_timeout())
+    return title
+
+
 class ModelContext(abc.ABC):
 
     def __init__(self, qs: typing.QuerySet):
@@ -56,8 +75,9 @@ class Page(Context):
         # For example `templates/layout/metadata.html`.
         self._page.display = {
             'page': self._page,
-            'tag_titles': tags_qs.as_title(),
+            'tag_titles': tags_title(tags_qs),
             'tags': tags_qs,
+            display.CACHE_KEY: tags_cache_key(tags_qs),
         }
         return {
             'page': self._page,
@@ -3,16 +3,22 @@ from pages.context.base import Context as BaseContext
 
 
 class Context(BaseContext):
-    def __init__(self, category: AbstractCategory):
+    def __init__(self, category: AbstractCategory, hide_empty=False):
+        """
+        :param hide_empty: Hide children without active products.
+            It requires connected `catalog.counts.ProductsCounts`.
+        """
         self.category = category
+        self.hide_empty = hide_empty
 
     def context(self):
+        children = (
+            self.category.get_children()
+            .bind_fields()
+            .active()
+            .order_by('name')
+        )
         return {
             'category': self.category,
-            'children': (
-                self.category.get_children()
-                .bind_fields()
-                .active()
-                .order_by('name')
-            ),
+            'children': children.with_products() if self.hide_empty else children,
         }
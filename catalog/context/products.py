@@ -1,27 +1,125 @@
-from functools import lru_cache
-
 from django import http
 from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 from catalog import typing
 from catalog.context.base import Products, Tags
+from catalog.models import TagQuerySet
 from images.models import ImageQuerySet
+from pages.cache import Version
+from pages.memo import memoize
 from refarm_pagination.context import PaginationContext
 
 
+class CachedBrands:
+    """
+    Products brands cached per product.
+
+    Call `invalidate_brands` on product's tags changes
+    and `invalidate_all_brands` on tags editing or connect the receivers:
+    >>> connect_brands_receivers(Product, Tag)
+    """
+
+    # Renew it to drop the brands of all the products.
+    VERSION = Version('catalog:brands:version')
+    # cache returns None for missed keys, so we store this one for products without brands
+    NO_BRAND = 0
+
+    def __init__(self, tags: TagQuerySet, timeout=DEFAULT_TIMEOUT):
+        self.tags = tags
+        self.timeout = timeout
+
+    @classmethod
+    def keys(cls, product_ids: typing.Iterable[int]) -> typing.Dict[str, int]:
+        """Return key -> product id pairs. The version is read once for all the keys."""
+        prefix = cls.VERSION.prefix()
+        return {f'{prefix}:{id_}': id_ for id_ in product_ids}
+
+    def get(self, product_ids: typing.Iterable[int]) -> typing.Dict[int, typing.Any]:
+        keys = self.keys(product_ids)
+        cached = {
+            keys[key]: brand
+            for key, brand in cache.get_many(keys).items()
+        }
+
+        missed = {key: id_ for key, id_ in keys.items() if id_ not in cached}
+        if missed:
+            fetched = self.tags.get_brands_by_product_ids(list(missed.values()))
+            cache.set_many({
+                key: fetched.get(id_, self.NO_BRAND)
+                for key, id_ in missed.items()
+            }, timeout=self.timeout)
+            cached.update(fetched)
+
+        return {
+            id_: brand
+            for id_, brand in cached.items()
+            if brand != self.NO_BRAND
+        }
+
+
+def invalidate_brands(product_ids: typing.Iterable[int]):
+    cache.delete_many(list(CachedBrands.keys(product_ids)))
+
+
+def invalidate_all_brands(*args, **kwargs):
+    """Drop the brands of all the products. Args allow to connect it to signals."""
+    CachedBrands.VERSION.renew()
+
+
+def invalidate_brands_receiver(instance, action, reverse, pk_set, **kwargs):
+    """Receiver for `m2m_changed` signal of the product-tag relation."""
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if not reverse:
+        invalidate_brands([instance.id])
+    elif pk_set is None:
+        # cleared products of the tag are unknown after the clearing
+        invalidate_all_brands()
+    else:
+        invalidate_brands(pk_set)
+
+
+def connect_brands_receivers(product_model, tag_model):
+    """Keep `CachedBrands` actual on product's tags changes and tags editing."""
+    m2m_changed.connect(
+        invalidate_brands_receiver, sender=product_model.tags.through,
+        dispatch_uid=f'catalog.brands.{product_model.__name__}.tags_changed',
+    )
+    post_save.connect(
+        invalidate_all_brands, sender=tag_model,
+        dispatch_uid=f'catalog.brands.{tag_model.__name__}.saved',
+    )
+    post_delete.connect(
+        invalidate_all_brands, sender=tag_model,
+        dispatch_uid=f'catalog.brands.{tag_model.__name__}.deleted',
+    )
+
+
 class ProductBrands(Products):
 
-    def __init__(self, products: typing.Products, tags: Tags):
+    def __init__(self, products: typing.Products, tags: Tags, cached=False):
         super().__init__(products)
         self._tags = tags
+        self._cached = cached
+
+    def brands(self, product_ids: typing.List[int]) -> typing.Dict[int, typing.Any]:
+        tags = self._tags.qs()
+        return (
+            CachedBrands(tags).get(product_ids)
+            if self._cached
+            else tags.get_brands_by_product_ids(product_ids)
+        )
 
     def context(self):
-        products = list(self._products)
-        brands = self._tags.qs().get_brands(products)
+        product_ids = [product.id for product in self._products]
+        brands = self.brands(product_ids)
 
         product_brands = {
-            product.id: brands.get(product)
-            for product in products
+            id_: brands.get(id_)
+            for id_ in product_ids
         }
 
         return {
@@ -57,17 +155,26 @@ class PaginatedProducts(Products):
 
     def __init__(
         self, products: typing.Products,
-        url: str, page_number: int, per_page: int
+        url: str, page_number: int, per_page: int,
+        count: int=None, is_approximate=False,
     ):
+        """
+        :param count: Ready products count.
+            See `cached_count` and `approximate_count` of refarm_pagination.
+        :param is_approximate: The count is approximate.
+        """
         if (
             page_number < 1 or
             per_page not in settings.CATEGORY_STEP_MULTIPLIERS
         ):
             raise http.Http404('Page does not exist.')
         super().__init__(products)
-        self._pagination = PaginationContext(url, page_number, per_page, products)
+        self._pagination = PaginationContext(
+            url, page_number, per_page, products,
+            count=count, is_approximate=is_approximate,
+        )
 
-    @lru_cache()
+    @memoize
     def _pagination_context(self):
         return self._pagination.context()
 
@@ -1,7 +1,62 @@
+import typing
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.http import Http404
 
 from catalog import models
 from catalog.context.base import Context, Tags
+from pages.cache import Version
+from pages.memo import memoize
+from pages.models import Page
+from pages.signals import Receivers
+
+# Renew it to drop all the cached tags counts.
+# `CountsReceivers` renews it on products, their pages and tags changes.
+# Renew it by hand after bulk updates. For example, after the catalog import.
+COUNTS_VERSION = Version('catalog:tags_counts:version')
+
+
+def counts_cache_key(category, tags: typing.Iterable[models.Tag]=()) -> str:
+    """Cache key for tags counts of the category filtered by the given tags."""
+    tag_ids = sorted(tag.id for tag in tags)
+    return COUNTS_VERSION.key(category.id, '-'.join(map(str, tag_ids)))
+
+
+class CountsReceivers(Receivers):
+    """
+    Renew the cached tags counts on products, their pages and tags changes.
+
+    >>> CountsReceivers(Product, Tag).connect()  # at `AppConfig.ready`
+    """
+
+    def __init__(self, product_model, tag_model):
+        self.product_model = product_model
+        self.tag_model = tag_model
+
+    def _page_changed(self, instance, **kwargs):
+        # product pages change products activity.
+        # Page proxies are senders too, so we listen all the models
+        if (
+            isinstance(instance, Page)
+            and instance.related_model_name == self.product_model._meta.db_table
+        ):
+            COUNTS_VERSION.renew()
+
+    def _receivers(self):
+        return [
+            (m2m_changed, COUNTS_VERSION.renew, self.product_model.tags.through),
+            (post_save, COUNTS_VERSION.renew, self.product_model),
+            (post_delete, COUNTS_VERSION.renew, self.product_model),
+            (post_save, COUNTS_VERSION.renew, self.tag_model),
+            (post_delete, COUNTS_VERSION.renew, self.tag_model),
+            (post_save, self._page_changed, None),
+            (post_delete, self._page_changed, None),
+        ]
+
+    def _dispatch_prefix(self) -> str:
+        return f'catalog.tags_counts.{self.product_model._meta.db_table}'
 
 
 class TagsByProducts(Tags):
@@ -16,12 +71,34 @@ class TagsByProducts(Tags):
 
 class GroupedTags(Context):
 
-    def __init__(self, tags: Tags):
+    def __init__(
+        self, tags: Tags,
+        products: models.ProductQuerySet=None, cache_key='', cache_timeout=DEFAULT_TIMEOUT,
+    ):
+        """
+        :param products: Add products count to every tag if products are given.
+        :param cache_key: Cache the counts by the key. See `counts_cache_key`.
+        """
         self._tags = tags
+        self._products = products
+        self._cache_key = cache_key
+        self._cache_timeout = cache_timeout
+
+    def counts(self, tags: models.TagQuerySet) -> typing.Optional[typing.Dict[int, int]]:
+        if self._products is None:
+            return None
+        if not self._cache_key:
+            return tags.count_products(self._products)
+        return cache.get_or_set(
+            self._cache_key,
+            lambda: tags.count_products(self._products),
+            timeout=self._cache_timeout,
+        )
 
     def context(self):
+        tags = self._tags.qs()
         return {
-            'group_tags_pairs': self._tags.qs().group_tags().items(),
+            'group_tags_pairs': tags.group_tags(counts=self.counts(tags)).items(),
         }
 
 
@@ -31,6 +108,7 @@ class ParsedTags(Tags):
         self._tags = tags
         self._raw_tags = raw_tags
 
+    @memoize
     def qs(self):
         tags = self._tags.qs()
         if not self._raw_tags:
@@ -43,6 +121,7 @@ class Checked404Tags(Tags):
     def __init__(self, tags: Tags):
         self._tags = tags
 
+    @memoize
     def qs(self):
         tags = self._tags.qs()
         if not tags.exists():
@@ -0,0 +1,223 @@
+"""
+Denormalized active products counts of categories.
+
+Every category stores two counts:
+- `products_count` - active products of the category itself;
+- `subtree_products_count` - active products of the category and its descendants.
+
+So categories trees show or hide nodes without products queries.
+Counts are updated incrementally by signals. Site connects them by itself:
+
+>>> counts = ProductsCounts(Category, Product)
+>>> counts.connect()  # at `AppConfig.ready`
+
+Bulk updates bypass signals. Use `recount_category_products` command after them.
+Fill the counts of existing categories by `recount` in a data migration.
+"""
+
+import typing
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, pre_delete, pre_save
+
+from catalog.tree import snapshot_version
+from pages.models import Page
+from pages.signals import Receivers
+
+ProductState = typing.Tuple[typing.Optional[int], bool]  # category id, is active
+
+
+class ProductsCounts(Receivers):
+
+    def __init__(self, category_model, product_model):
+        self.category_model = category_model
+        self.product_model = product_model
+
+    def __repr__(self):
+        return f'<ProductsCounts categories={self.category_model._meta.db_table}>'
+
+    def recount(self, batch_size=1000) -> int:
+        """
+        Recount all the categories with one products query and one tree query.
+
+        Subtree counts are summed up by MPTT ranges.
+        :return: updated categories count.
+        """
+        # historical models of migrations have no `active` method
+        direct = Counter(dict(
+            self.product_model.objects
+            .filter(page__is_active=True)
+            .values_list('category_id')
+            .annotate(models.Count('id'))
+            .order_by()
+        ))
+
+        subtree = Counter()
+        # ancestors stack of the current category in the tree
+        ancestors: typing.List[typing.Tuple[int, int, int]] = []
+        categories = list(
+            self.category_model.objects
+            .order_by('tree_id', 'lft')
+            .values_list('id', 'tree_id', 'rght')
+        )
+        for id_, tree_id, rght in categories:
+            while ancestors and (ancestors[-1][1] != tree_id or ancestors[-1][2] < rght):
+                ancestors.pop()
+            ancestors.append((id_, tree_id, rght))
+            for ancestor_id, _, _ in ancestors:
+                subtree[ancestor_id] += direct[id_]
+
+        with transaction.atomic():
+            for start in range(0, len(categories), batch_size):
+                ids = [id_ for id_, _, _ in categories[start:start + batch_size]]
+                self.category_model.objects.filter(id__in=ids).update(**{
+                    field: models.Case(
+                        *[
+                            models.When(id=id_, then=models.Value(counts[id_]))
+                            for id_ in ids
+                        ],
+                        output_field=models.PositiveIntegerField(),
+                    )
+                    for field, counts in [
+                        ('products_count', direct),
+                        ('subtree_products_count', subtree),
+                    ]
+                })
+        self._renew_tree()
+        return len(categories)
+
+    def add(self, category_id: int, delta: int):
+        """Add delta to the category's count and to the subtree counts of its ancestors."""
+        if not category_id or not delta:
+            return
+        category = self.category_model.objects.filter(id=category_id).first()
+        if not category:
+            return
+        self.category_model.objects.filter(id=category_id).update(
+            products_count=self._added('products_count', delta),
+        )
+        self._add_to_ancestors(category, delta)
+
+    def _add_to_ancestors(self, category, delta: int):
+        """Add delta to subtree counts of the category and its ancestors."""
+        (
+            self.category_model.objects
+            .filter(tree_id=category.tree_id, lft__lte=category.lft, rght__gte=category.rght)
+            .update(subtree_products_count=self._added('subtree_products_count', delta))
+        )
+        self._renew_tree()
+
+    def _renew_tree(self):
+        # queryset updates bypass the category signals of the tree snapshot
+        snapshot_version(self.category_model).renew()
+
+    @staticmethod
+    def _added(field: str, delta: int) -> models.Func:
+        # drifted counts are not negative, till the next recount fixes them
+        return Greatest(models.F(field) + delta, 0)
+
+    def _product_state(self, product_id: int) -> ProductState:
+        category_id, is_active = (
+            self.product_model.objects
+            .filter(id=product_id)
+            .values_list('category_id', 'page__is_active')
+            .first()
+        ) or (None, False)
+        # product without page is not active
+        return category_id, bool(is_active)
+
+    def _apply(self, old: ProductState, new: ProductState):
+        if old == new:
+            return
+        old_category_id, was_active = old
+        category_id, is_active = new
+        if was_active:
+            self.add(old_category_id, -1)
+        if is_active:
+            self.add(category_id, 1)
+
+    # ------- Signal receivers -------
+    def _remember_product(self, instance, **kwargs):
+        instance._counts_state = (
+            self._product_state(instance.id) if instance.id else (None, False)
+        )
+
+    def _product_saved(self, instance, **kwargs):
+        old = getattr(instance, '_counts_state', (None, False))
+        self._apply(old, self._product_state(instance.id))
+
+    def _product_deleting(self, instance, **kwargs):
+        # the product's page may be deleted after the product,
+        # so we read the state before deletion
+        self._apply(self._product_state(instance.id), (None, False))
+
+    def _remember_page(self, instance, **kwargs):
+        # page proxies are senders too, so we listen all the models
+        if not isinstance(instance, Page) or not instance.id:
+            return
+        instance._counts_is_active = (
+            Page.objects.filter(id=instance.id)
+            .values_list('is_active', flat=True)
+            .first()
+        )
+
+    def _page_saved(self, instance, created, **kwargs):
+        if not isinstance(instance, Page) or created:
+            return
+        if instance.related_model_name != self.product_model._meta.db_table:
+            return
+        was_active = getattr(instance, '_counts_is_active', instance.is_active)
+        if was_active == instance.is_active:
+            return
+        category_id = (
+            self.product_model.objects
+            .filter(page=instance)
+            .values_list('category_id', flat=True)
+            .first()
+        )
+        self.add(category_id, 1 if instance.is_active else -1)
+
+    def _remember_parent(self, instance, **kwargs):
+        stored = (
+            self.category_model.objects
+            .filter(id=instance.id)
+            .values_list('parent_id', 'products_count', 'subtree_products_count')
+            .first()
+        ) if instance.id else None
+        if not stored:
+            instance._counts_parent_id = None
+            return
+        # save writes all the fields, so the instance should not overwrite
+        # counts updated after its loading
+        (
+            instance._counts_parent_id,
+            instance.products_count,
+            instance.subtree_products_count,
+        ) = stored
+
+    def _category_saved(self, instance, created, **kwargs):
+        """Move the subtree count from the old ancestors to the new ones."""
+        old_parent_id = getattr(instance, '_counts_parent_id', None)
+        if created or old_parent_id == instance.parent_id:
+            return
+        count = instance.subtree_products_count
+        for parent_id, delta in [(old_parent_id, -count), (instance.parent_id, count)]:
+            parent = self.category_model.objects.filter(id=parent_id).first()
+            if parent:
+                self._add_to_ancestors(parent, delta)
+
+    def _receivers(self):
+        return [
+            (pre_save, self._remember_product, self.product_model),
+            (post_save, self._product_saved, self.product_model),
+            (pre_delete, self._product_deleting, self.product_model),
+            (pre_save, self._remember_page, None),
+            (post_save, self._page_saved, None),
+            (pre_save, self._remember_parent, self.category_model),
+            (post_save, self._category_saved, self.category_model),
+        ]
+
+    def _dispatch_prefix(self) -> str:
+        return f'catalog.counts.{self.category_model._meta.db_table}'
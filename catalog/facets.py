@@ -0,0 +1,265 @@
+"""
+Faceted tags filtering backed by precomputed bitmaps.
+
+`ProductQuerySet.tagged` and `TagQuerySet.filter_by_products` do
+one join per tags group and distinct selects.
+Facets engine keeps product x tag membership of every category as bitmaps
+and answers the same questions with bitwise operations:
+- products matching tags: OR within a group and AND across groups;
+- tags reachable from the matched products.
+
+Engine is optional. Site connects it to its models by itself:
+
+>>> facets = Facets(Product, Tag)
+>>> facets.connect()  # at `AppConfig.ready`
+>>> products = facets.products(category, tags)
+>>> tags = facets.tags(category, tags)
+"""
+
+import typing
+from collections import defaultdict
+from functools import reduce
+from operator import and_
+
+from django.core.cache import cache
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from pages.cache import Version
+from pages.models import Page
+from pages.signals import Receivers
+
+# Python int is an arbitrary size bitset.
+# Bit number N is set if the product at the N position is in a set.
+Bitmap = int
+TagPair = typing.Tuple[int, int]  # tag id, group id
+
+
+class FacetIndex:
+    """Product x tag membership of the category and its descendants."""
+
+    def __init__(self, category_id: int, rows: typing.Iterable[typing.Tuple]):
+        """:param rows: `(product_id, tag_id, group_id)` triples."""
+        self.category_id = category_id
+        self._positions: typing.Dict[int, int] = {}
+        self._product_ids: typing.List[int] = []
+        self._tags: typing.Dict[int, Bitmap] = defaultdict(int)
+        self._all: Bitmap = 0
+
+        for product_id, tag_id, group_id in rows:
+            bit = self._add_position(product_id)
+            if tag_id is not None:
+                self._tags[tag_id] |= bit
+
+    def __len__(self):
+        return bin(self._all).count('1')
+
+    def __repr__(self):
+        return f'<FacetIndex category={self.category_id} products={len(self)}>'
+
+    def __contains__(self, product_id: int):
+        return bool(self._bit(product_id) & self._all)
+
+    def _bit(self, product_id: int) -> Bitmap:
+        position = self._positions.get(product_id)
+        return 0 if position is None else 1 << position
+
+    def _add_position(self, product_id: int) -> Bitmap:
+        if product_id not in self._positions:
+            self._positions[product_id] = len(self._product_ids)
+            self._product_ids.append(product_id)
+        bit = self._bit(product_id)
+        self._all |= bit
+        return bit
+
+    def add_product(self, product_id: int, tags: typing.Iterable[TagPair]):
+        bit = self._add_position(product_id)
+        for tag_id, _ in tags:
+            self._tags[tag_id] |= bit
+
+    def remove_product(self, product_id: int):
+        """Clear the product's bits. The position is reused by next adding."""
+        mask = ~self._bit(product_id)
+        self._all &= mask
+        for tag_id in self._tags:
+            self._tags[tag_id] &= mask
+
+    def match(self, tags: typing.Iterable[TagPair]) -> Bitmap:
+        """Products with the given tags: OR within a group and AND across groups."""
+        groups: typing.Dict[int, Bitmap] = defaultdict(int)
+        for tag_id, group_id in tags:
+            groups[group_id] |= self._tags.get(tag_id, 0)
+        return reduce(and_, groups.values(), self._all)
+
+    def reachable(self, products: Bitmap) -> typing.Set[int]:
+        """Tags having at least one of the given products."""
+        return {
+            tag_id for tag_id, bitmap in self._tags.items()
+            if bitmap & products
+        }
+
+    def product_ids(self, products: Bitmap) -> typing.List[int]:
+        ids = []
+        while products:
+            lowest = products & -products
+            ids.append(self._product_ids[lowest.bit_length() - 1])
+            products ^= lowest
+        return ids
+
+
+class Facets(Receivers):
+    """
+    Facets indexes for all the categories of the given product model.
+
+    Indexes are stored in the django cache and built lazily.
+    Product's tags, category or activity changes update the loaded indexes
+    of the product's categories in place.
+    Tags and categories changes rebuild all the indexes lazily.
+    """
+
+    def __init__(self, product_model, tag_model, timeout=None):
+        self.product_model = product_model
+        self.tag_model = tag_model
+        self.category_model = product_model._meta.get_field('category').related_model
+        self.timeout = timeout
+        self.version = Version(
+            f'catalog:facets:{product_model._meta.db_table}:version'
+        )
+
+    def _key(self, category_id: int) -> str:
+        return self.version.key(category_id)
+
+    def _build(self, category_id: int) -> FacetIndex:
+        category = self.category_model.objects.get(id=category_id)
+        rows = (
+            self.product_model.objects
+            .active()
+            .filter_descendants(category)
+            .order_by('id')
+            .values_list('id', 'tags', 'tags__group')
+        )
+        return FacetIndex(category_id, rows)
+
+    def index(self, category) -> FacetIndex:
+        key = self._key(category.id)
+        index = cache.get(key)
+        if index is None:
+            index = self._build(category.id)
+            cache.set(key, index, timeout=self.timeout)
+        return index
+
+    def _match(self, category, tags) -> typing.Tuple[FacetIndex, Bitmap]:
+        index = self.index(category)
+        return index, index.match((tag.id, tag.group_id) for tag in tags or [])
+
+    def products(self, category, tags=None) -> models.QuerySet:
+        """Replacement for `filter_descendants(category).tagged_or_all(tags)`."""
+        index, matched = self._match(category, tags)
+        return self.product_model.objects.filter(id__in=index.product_ids(matched))
+
+    def tags(self, category, tags=None) -> models.QuerySet:
+        """Replacement for `filter_by_products` with the tagged products."""
+        index, matched = self._match(category, tags)
+        return self.tag_model.objects.filter(id__in=index.reachable(matched))
+
+    def update_product(self, product_id: int, category_ids: typing.Iterable[int]):
+        """Update the product's bits at the loaded indexes of the given categories."""
+        keys = {self._key(id_): id_ for id_ in set(category_ids)}
+        indexes = cache.get_many(keys)
+        if not indexes:
+            return
+
+        product = (
+            self.product_model.objects
+            .active()
+            .select_related('category')
+            .filter(id=product_id)
+            .first()
+        )
+        own_categories = set()
+        tags = []
+        if product:
+            own_categories = set(
+                product.category.get_ancestors(include_self=True)
+                .values_list('id', flat=True)
+            )
+            tags = list(product.tags.values_list('id', 'group_id'))
+
+        for index in indexes.values():
+            index.remove_product(product_id)
+            if index.category_id in own_categories:
+                index.add_product(product_id, tags)
+        cache.set_many(indexes, timeout=self.timeout)
+
+    def _category_ids(self, category_id: int) -> typing.List[int]:
+        category = self.category_model.objects.filter(id=category_id).first()
+        if not category:
+            return []
+        return list(
+            category.get_ancestors(include_self=True)
+            .values_list('id', flat=True)
+        )
+
+    # ------- Signal receivers -------
+    def _remember_category(self, instance, **kwargs):
+        instance._facets_category_id = (
+            self.product_model.objects
+            .filter(id=instance.id)
+            .values_list('category_id', flat=True)
+            .first()
+        ) if instance.id else None
+
+    def _product_saved(self, instance, **kwargs):
+        old_category_id = getattr(instance, '_facets_category_id', None)
+        self.update_product(instance.id, [
+            *self._category_ids(old_category_id),
+            *self._category_ids(instance.category_id),
+        ])
+
+    def _product_deleted(self, instance, **kwargs):
+        self.update_product(instance.id, self._category_ids(instance.category_id))
+
+    def _tags_changed(self, instance, action, reverse, pk_set, **kwargs):
+        if action not in ['post_add', 'post_remove', 'post_clear']:
+            return
+        if reverse:
+            # tag.products.add(...) or similar
+            if pk_set is None:
+                self.version.renew()
+                return
+            products = self.product_model.objects.filter(id__in=pk_set)
+        else:
+            products = [instance]
+        for product in products:
+            self.update_product(product.id, self._category_ids(product.category_id))
+
+    def _page_saved(self, instance, **kwargs):
+        # page proxies are senders too, so we listen all the models
+        if not isinstance(instance, Page):
+            return
+        if instance.related_model_name != self.product_model._meta.db_table:
+            return
+        product = self.product_model.objects.filter(page=instance).first()
+        if product:
+            self.update_product(product.id, self._category_ids(product.category_id))
+
+    def _tag_saved(self, instance, created, **kwargs):
+        # new tags have no products yet
+        if not created:
+            self.version.renew()
+
+    def _receivers(self):
+        return [
+            (pre_save, self._remember_category, self.product_model),
+            (post_save, self._product_saved, self.product_model),
+            (post_delete, self._product_deleted, self.product_model),
+            (m2m_changed, self._tags_changed, self.product_model.tags.through),
+            (post_save, self._page_saved, None),
+            (post_save, self._tag_saved, self.tag_model),
+            (post_delete, self.version.renew, self.tag_model),
+            (post_save, self.version.renew, self.category_model),
+            (post_delete, self.version.renew, self.category_model),
+        ]
+
+    def _dispatch_prefix(self) -> str:
+        return f'catalog.facets.{self.product_model._meta.db_table}'
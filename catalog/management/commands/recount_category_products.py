@@ -0,0 +1,33 @@
+"""Recount denormalized active products counts of all the categories."""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from catalog.counts import ProductsCounts
+
+
+class Command(BaseCommand):
+
+    help = 'Recount direct and subtree active products counts of categories.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'category_model',
+            help='Category model label. For example `shop.Category`.',
+        )
+        parser.add_argument(
+            'product_model',
+            help='Product model label. For example `shop.Product`.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Categories count updated by one query.',
+        )
+
+    def handle(self, *args, **options):
+        counts = ProductsCounts(
+            apps.get_model(options['category_model']),
+            apps.get_model(options['product_model']),
+        )
+        categories_count = counts.recount(batch_size=options['batch_size'])
+        self.stdout.write(f'Recounted products of {categories_count} categories.')
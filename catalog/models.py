@@ -1,4 +1,5 @@
-import random
+import hashlib
+import re
 import string
 import typing
 from collections import OrderedDict
@@ -14,15 +15,84 @@ from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from unidecode import unidecode
 
-from catalog.models_expressions import Substring
+from pages.cache import display_version
 
 
-def randomize_slug(slug: str, hash_size: int) -> str:
-    hash_size = hash_size
-    slug_hash = ''.join(
-        random.choices(string.ascii_lowercase, k=hash_size)
+def slugify_name(name: str) -> str:
+    # Translate all punctuation chars to "_".
+    # It doesn't conflict with `slugify`, which translate spaces to "-"
+    # and punctuation chars to "".
+    return slugify(unidecode(name.translate(
+        {ord(p): '_' for p in string.punctuation}
+    )))
+
+
+def cut_slug(slug: str, source: str, max_length: int, hash_size: int) -> str:
+    """
+    Keep the slug length not greater then `max_length`.
+
+    The cut slug gets the hash of the source string as a suffix.
+    So the same source always gets the same slug.
+    """
+    if len(slug) < max_length:
+        return slug
+    slug_hash = hashlib.md5(source.encode()).hexdigest()[:hash_size]
+    return f'{slug[:max_length - hash_size - 1]}_{slug_hash}'
+
+
+TAG_SORT_NAME_PATTERN = re.compile(r'[a-zA-Zа-яА-Я\s\-_,:;]+')
+TAG_SORT_VALUE_PATTERN = re.compile(r'[0-9]+\.?[0-9]*')
+
+
+def get_tag_sort_keys(name: str) -> typing.Tuple[str, float]:
+    """
+    Return alphabetic and numeric sort keys of the tag name.
+
+    The alphabetic key is the first alphabetic chunk of the name
+    in lower case without whitespaces and punctuation.
+    The numeric key is the first number of the name or zero.
+    """
+    alpha = TAG_SORT_NAME_PATTERN.search(name)
+    number = TAG_SORT_VALUE_PATTERN.search(name)
+    return (
+        ''.join(char for char in alpha.group().lower() if char.isalpha()) if alpha else '',
+        float(number.group()) if number else 0,
     )
-    return f'{slug}_{slug_hash}'
+
+
+def fill_tags_sort_keys(tags: models.QuerySet, batch_size=1000) -> int:
+    """
+    Fill `sort_name` and `sort_value` columns of the given tags.
+
+    Updates every batch of tags with one query.
+    It works with historical models too, so migrations can use it.
+    :return: updated tags count.
+    """
+    count = 0
+    last_id = 0
+    while True:
+        batch = list(
+            tags.filter(id__gt=last_id).order_by('id').values_list('id', 'name')[:batch_size]
+        )
+        if not batch:
+            return count
+
+        keys = {id_: get_tag_sort_keys(name) for id_, name in batch}
+        tags.model.objects.filter(id__in=keys).update(**{
+            field: models.Case(
+                *[
+                    models.When(id=id_, then=models.Value(key[i]))
+                    for id_, key in keys.items()
+                ],
+                output_field=output_field,
+            )
+            for i, (field, output_field) in enumerate([
+                ('sort_name', models.CharField()),
+                ('sort_value', models.FloatField()),
+            ])
+        })
+        count += len(batch)
+        last_id = batch[-1][0]
 
 
 class AdminTreeDisplayMixin(object):
@@ -46,6 +116,10 @@ class CategoryQuerySet(mptt.querysets.TreeQuerySet):
     def active(self):
         return self.filter(page__is_active=True)
 
+    def with_products(self):
+        """Categories with active products in their subtrees. It doesn't query products."""
+        return self.filter(subtree_products_count__gt=0)
+
 
 class CategoryManager(
     mptt.managers.TreeManager.from_queryset(CategoryQuerySet),
@@ -65,6 +139,9 @@ class CategoryManager(
     def active(self):
         return self.get_queryset().active()
 
+    def with_products(self):
+        return self.get_queryset().with_products()
+
 
 class AbstractCategory(mptt.models.MPTTModel, AdminTreeDisplayMixin):
 
@@ -86,6 +163,12 @@ class AbstractCategory(mptt.models.MPTTModel, AdminTreeDisplayMixin):
         verbose_name=_('parent'),
     )
 
+    # Denormalized active products counts. `catalog.counts.ProductsCounts` updates them.
+    products_count = models.PositiveIntegerField(default=0, editable=False)
+    subtree_products_count = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False,
+    )
+
     def __str__(self):
         return self.name
 
@@ -100,12 +183,23 @@ class ProductQuerySet(models.QuerySet):
         """Prefetch or select typical related fields to reduce sql queries count."""
         return (
             self.select_related('page')
+            .select_related('page__main_image_record')
             .select_related('category')
             .prefetch_related('page__images')
         )
 
     def filter_descendants(self, category: models.Model) -> models.QuerySet:
-        return self.filter(category__in=category.get_descendants(True))
+        """
+        Filter products of the category and its descendants.
+
+        Descendants have `lft` inside the category's range in the same tree.
+        So the query joins categories by the range and uses
+        (tree_id, lft) index, which MPTT adds to every tree model.
+        """
+        return self.filter(
+            category__tree_id=category.tree_id,
+            category__lft__range=(category.lft, category.rght),
+        )
 
     def active(self):
         return self.filter(page__is_active=True)
@@ -257,42 +351,38 @@ class TagGroup(models.Model):
         default=0, blank=True, db_index=True, verbose_name=_('position'),
     )
 
-    # @todo #302:30m  Resolve slug code doubling.
-    #  See `TagGroup.slug` and `Tag._get_slug`.
-    @property
-    def slug(self) -> str:
-        """Make a slug from the name."""
-        # Translate all punctuation chars to "_".
-        # It doesn't conflict with `slugify`, which translate spaces to "-"
-        # and punctuation chars to "".
-        slug = slugify(unidecode(self.name.translate(
-            {ord(p): '_' for p in string.punctuation}
-        )))
-
-        # Keep the slug length less then SLUG_MAX_LENGTH
-        if len(slug) < self.SLUG_MAX_LENGTH:
-            return slug
-
-        slug_length = self.SLUG_MAX_LENGTH - self.SLUG_HASH_SIZE - 1
-        return randomize_slug(
-            slug[:slug_length],
-            hash_size=self.SLUG_HASH_SIZE
-        )
+    # Computed from the name on the first save.
+    # Tags urls are built from stored slugs only.
+    slug = models.SlugField(
+        blank=True, db_index=True, editable=False, max_length=SLUG_MAX_LENGTH,
+    )
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_slug(cls, name: str) -> str:
+        return cut_slug(
+            slugify_name(name), source=name,
+            max_length=cls.SLUG_MAX_LENGTH, hash_size=cls.SLUG_HASH_SIZE,
+        )
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self.get_slug(self.name)
+        super().save(*args, **kwargs)
+
 
 class TagQuerySet(models.QuerySet):
 
     def order_by_alphanumeric(self):
         """Sort the Tag by name's alphabetic chars and then by numeric chars."""
-        return self.annotate(
-            tag_name=Substring(models.F('name'), models.Value('[a-zA-Zа-яА-Я\s\-_,:;]+')),
-            tag_value=models.functions.Cast(
-                Substring(models.F('name'), models.Value('[0-9]+\.?[0-9]*')),
-                models.FloatField(),
-        )).order_by('group__position', 'group__name', 'tag_name', 'tag_value')
+        return self.order_by('group__position', 'group__name', 'sort_name', 'sort_value')
+
+    def bulk_create(self, objs, *args, **kwargs):
+        for tag in objs:
+            tag.fill_sort_keys()
+        return super().bulk_create(objs, *args, **kwargs)
 
     def filter_by_products(self, products: typing.Iterable[AbstractProduct]):
         return (
@@ -308,13 +398,54 @@ class TagQuerySet(models.QuerySet):
             .distinct()
         )
 
-    def group_tags(self) -> typing.Dict[TagGroup, typing.List['Tag']]:
+    def _products_relation(self) -> typing.Tuple[typing.Type[models.Model], str, str]:
+        """Return the product-tag through model, its tag and product fields names."""
+        relation = self.model._meta.get_field('products')
+        return (
+            relation.through,
+            relation.field.m2m_reverse_field_name(),
+            relation.field.m2m_field_name(),
+        )
+
+    def count_products(
+        self, products: typing.Iterable[AbstractProduct]
+    ) -> typing.Dict[int, int]:
+        """
+        Count products for every tag with the single query.
+
+        The query groups the product-tag through table by tag.
+        :return: tag id -> products count pairs.
+        """
+        through, tag_field, product_field = self._products_relation()
+        return dict(
+            through.objects
+            .filter(**{
+                f'{tag_field}__in': self,
+                f'{product_field}__in': products,
+            })
+            .values_list(tag_field)
+            .annotate(models.Count(product_field))
+            .order_by()
+        )
+
+    def group_tags(
+        self,
+        products: typing.Iterable[AbstractProduct]=None,
+        counts: typing.Dict[int, int]=None,
+    ) -> typing.Dict[TagGroup, typing.List['Tag']]:
         """
         Return set of group_tag pairs with specific properties.
 
         Every pair contains tag group and sorted tag list.
         It's sorted alphabetically and then numerically.
+        :param products: Set `products_count` field for every tag
+            counted among the given products.
+        :param counts: Ready tag id -> products count pairs.
+            For example, cached ones. See `count_products` method.
         """
+        if counts is None and products is not None:
+            counts = self.count_products(products)
+
         # @todo #STB374:120m Move tag's value to separated field.
         #  Now we have fields like `tag.name == '10 м'`.
         #  But should have smth like this:
@@ -324,26 +455,67 @@ class TagQuerySet(models.QuerySet):
 
         grouped = OrderedDict()
         for tag in ordered:
+            if counts is not None:
+                tag.products_count = counts.get(tag.id, 0)
             if tag.group in grouped:
                 grouped[tag.group].append(tag)
             else:
                 grouped[tag.group] = [tag]
         return grouped
 
-    def get_brands(self, products: typing.Iterable[AbstractProduct]) -> typing.Dict[AbstractProduct, 'Tag']:
-        brand_tags = (
-            self.filter(group__name=settings.BRAND_TAG_GROUP_NAME)
-            .filter_by_products(products)
-            .prefetch_related('products')
+    def get_brands_by_product_ids(
+        self, product_ids: typing.Iterable[int]
+    ) -> typing.Dict[int, 'Tag']:
+        """
+        Return product id -> brand tag pairs.
+
+        Reads product-tag pairs from the through table
+        and builds the map in one pass.
+        """
+        through, tag_field, product_field = self._products_relation()
+        pairs = list(
+            through.objects
+            .filter(**{
+                f'{product_field}__in': list(product_ids),
+                f'{tag_field}__in': self.filter(group__name=settings.BRAND_TAG_GROUP_NAME),
+            })
+            .values_list(product_field, tag_field)
+        )
+        if not pairs:
+            return {}
+
+        brands = (
+            self.model.objects
             .select_related('group')
+            .in_bulk({tag_id for _, tag_id in pairs})
         )
+        return {
+            product_id: brands[tag_id]
+            for product_id, tag_id in pairs
+        }
 
+    def get_brands(self, products: typing.Iterable[AbstractProduct]) -> typing.Dict[AbstractProduct, 'Tag']:
+        products = list(products)
+        brands = self.get_brands_by_product_ids(product.id for product in products)
         return {
-            product: brand
-            for brand in brand_tags for product in products
-            if product in brand.products.all()
+            product: brands[product.id]
+            for product in products
+            if product.id in brands
         }
 
+    def _group_values(self, field_name: str) -> typing.Dict[int, typing.List[str]]:
+        """
+        Return group id -> sorted tags column values pairs.
+
+        Reads the column only, without tags and groups instances.
+        Groups and tags have the same order as `group_tags` has.
+        """
+        grouped = OrderedDict()
+        rows = self.order_by_alphanumeric().values_list('group_id', field_name)
+        for group_id, value in rows:
+            grouped.setdefault(group_id, []).append(value)
+        return grouped
+
     def as_string(  # Ignore PyDocStyleBear
         self,
         field_name: str,
@@ -351,20 +523,14 @@ class TagQuerySet(models.QuerySet):
         group_delimiter: str,
     ) -> str:
         """
-        :param field_name: Only field's value is used to represent tag as string.
+        :param field_name: Only this column's value is used to represent tag as string.
         :param type_delimiter:
         :param group_delimiter:
         :return:
         """
-        if not self:
-            return ''
-
-        group_tags_map = self.group_tags()
-        tags_by_group = list(group_tags_map.values())
-
         return group_delimiter.join(
-            type_delimiter.join(getattr(tag, field_name) for tag in tags_list)
-            for tags_list in tags_by_group
+            type_delimiter.join(values)
+            for values in self._group_values(field_name).values()
         )
 
     def as_title(self) -> str:
@@ -387,15 +553,9 @@ class TagQuerySet(models.QuerySet):
         type_delimiter: str,
         group_delimiter: str,
     ) -> str:
-        if not self:
-            return ''
-
-        group_tags_map = self.group_tags()
-        tags_by_group = list(group_tags_map.values())
-
         return group_delimiter.join(
-            type_delimiter.join(getattr(tag, field_name) for tag in tags_list)
-            for tags_list in tags_by_group
+            type_delimiter.join(values)
+            for values in self._group_values(field_name).values()
         )
 
     def serialize_tags_to_url(self) -> str:
@@ -421,8 +581,11 @@ class TagManager(models.Manager.from_queryset(TagQuerySet)):
     def order_by_alphanumeric(self):
         return self.get_queryset().order_by_alphanumeric()
 
-    def group_tags(self):
-        return self.get_queryset().group_tags()
+    def group_tags(self, products=None, counts=None):
+        return self.get_queryset().group_tags(products, counts)
+
+    def count_products(self, products):
+        return self.get_queryset().count_products(products)
 
     def filter_by_products(self, products):
         return self.get_queryset().filter_by_products(products)
@@ -431,6 +594,9 @@ class TagManager(models.Manager.from_queryset(TagQuerySet)):
         """Get a batch of products' brands."""
         return self.get_queryset().get_brands(products)
 
+    def get_brands_by_product_ids(self, product_ids):
+        return self.get_queryset().get_brands_by_product_ids(product_ids)
+
     def parsed(self, raw):
         return self.get_queryset().parsed(raw)
 
@@ -457,32 +623,30 @@ class Tag(models.Model):
         blank=False, unique=False, max_length=SLUG_MAX_LENGTH,
     )
 
+    # Sort keys for `order_by_alphanumeric`. Filled from the name on save.
+    # See `get_tag_sort_keys` and `fill_tags_sort_keys` for existing tags.
+    sort_name = models.CharField(
+        max_length=1000, blank=True, db_index=True, editable=False,
+    )
+    sort_value = models.FloatField(default=0, db_index=True, editable=False)
+
     def __str__(self):
         return self.name
 
     def _get_slug(self) -> str:
-        # Translate all punctuation chars to "_".
-        # It doesn't conflict with `slugify`, which translate spaces to "-"
-        # and punctuation chars to "".
-        slug = slugify(unidecode(self.name.translate(
-            {ord(p): '_' for p in string.punctuation}
-        )))
-
-        slug = '__'.join([self.group.slug, slug])
-
-        # Keep the slug length less then SLUG_MAX_LENGTH
-        if len(slug) < self.SLUG_MAX_LENGTH:
-            return slug
-
-        slug_length = self.SLUG_MAX_LENGTH - self.SLUG_HASH_SIZE - 1
-        return randomize_slug(
-            slug=slug[:slug_length],
-            hash_size=self.SLUG_HASH_SIZE
+        slug = '__'.join([self.group.slug, slugify_name(self.name)])
+        return cut_slug(
+            slug, source=f'{self.group.slug}__{self.name}',
+            max_length=self.SLUG_MAX_LENGTH, hash_size=self.SLUG_HASH_SIZE,
         )
 
+    def fill_sort_keys(self):
+        self.sort_name, self.sort_value = get_tag_sort_keys(self.name)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self._get_slug()
+        self.fill_sort_keys()
         super(Tag, self).save(*args, **kwargs)
 
     # @todo #168:15m Move `Tags.parse_url_tags` Tags context.
@@ -493,3 +657,9 @@ class Tag(models.Model):
         return set(chain.from_iterable(
             group.split(settings.TAG_GROUPS_URL_DELIMITER) for group in groups
         ))
+
+
+def renew_display_version(instance, **kwargs):
+    # tags titles are rendered by page templates. See `pages.display`
+    if isinstance(instance, (Tag, TagGroup)):
+        display_version.renew()
@@ -132,3 +132,11 @@ class IndexTagAlphanumeric:
                 backward=DroppedIndex(name=self.ALPHANUMERIC_NAME),
             ),
         ]
+
+    def v3(self) -> typing.List[IndexOperation]:
+        """
+        Drop the index.
+
+        `Tag.sort_name` and `Tag.sort_value` indexed columns replace it.
+        """
+        return [RevertedOperation(self.v2()[-1])]
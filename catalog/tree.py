@@ -0,0 +1,166 @@
+"""
+Cached snapshot of the categories tree.
+
+The snapshot is built from one ordered MPTT query
+and stored in the django cache as the list of plain tuples.
+Category and category page edits renew the snapshot's version,
+so views rebuild it only after the tree changes. Site connects it by itself:
+
+>>> tree = TreeSnapshot(Category)
+>>> tree.connect()  # at `AppConfig.ready`
+>>> tree.roots()
+
+Products counts of nodes come from `catalog.counts` denormalized fields.
+`ProductsCounts` renews the snapshot's version after it updates them.
+"""
+
+import typing
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from pages.cache import Version
+from pages.models import Page
+from pages.signals import Receivers
+
+
+class TreeNode(typing.NamedTuple):
+    """Category data for tree rendering. It has the same interface as the category."""
+
+    id: int
+    parent_id: typing.Optional[int]
+    name: str
+    menu_title: str
+    url: str
+    page_id: int
+    position: int
+    is_active: bool
+    tree_id: int
+    lft: int
+    rght: int
+    level: int
+    products_count: int
+    subtree_products_count: int
+
+    def get_absolute_url(self):
+        return self.url
+
+    def get_admin_tree_title(self):
+        return f'[{self.id}] {self.name}'
+
+    def is_leaf_node(self):
+        return self.rght - self.lft == 1
+
+
+def snapshot_version(category_model) -> Version:
+    return Version(f'catalog:tree:{category_model._meta.db_table}:version')
+
+
+class TreeSnapshot(Receivers):
+
+    def __init__(self, category_model, timeout=None):
+        self.category_model = category_model
+        self.timeout = timeout
+        self.version = snapshot_version(category_model)
+
+    def __repr__(self):
+        return f'<TreeSnapshot categories={self.category_model._meta.db_table}>'
+
+    def build(self) -> typing.List[tuple]:
+        """Build the snapshot rows with one query. Rows are ordered as MPTT tree."""
+        categories = (
+            self.category_model.objects
+            .select_related('page')
+            .order_by('tree_id', 'lft')
+        )
+        return [
+            tuple(TreeNode(
+                id=category.id,
+                parent_id=category.parent_id,
+                name=category.name,
+                # the stored fields, so the node costs no template queries
+                menu_title=(
+                    category.page.menu_title or category.page.name
+                    if category.page else category.name
+                ),
+                url=category.get_absolute_url(),
+                page_id=category.page_id,
+                position=category.page.position if category.page else 0,
+                is_active=category.page.is_active if category.page else False,
+                tree_id=category.tree_id,
+                lft=category.lft,
+                rght=category.rght,
+                level=category.level,
+                products_count=category.products_count,
+                subtree_products_count=category.subtree_products_count,
+            ))
+            for category in categories
+        ]
+
+    def rows(self) -> typing.List[tuple]:
+        key = self.version.key()
+        rows = cache.get(key)
+        if rows is None:
+            rows = self.build()
+            cache.set(key, rows, self.timeout)
+        return rows
+
+    def nodes(self) -> typing.List[TreeNode]:
+        return [TreeNode(*row) for row in self.rows()]
+
+    def children_map(
+        self, active=False, hide_empty=False,
+    ) -> typing.Dict[typing.Optional[int], typing.List[TreeNode]]:
+        """
+        Return parent id -> children nodes pairs. Roots are children of None.
+
+        :param active: Skip inactive nodes with their subtrees.
+        :param hide_empty: Skip nodes without active products in their subtrees.
+        """
+        children = {}
+        skipped = set()
+        for node in self.nodes():
+            if (
+                node.parent_id in skipped
+                or (active and not node.is_active)
+                or (hide_empty and not node.subtree_products_count)
+            ):
+                skipped.add(node.id)
+                continue
+            children.setdefault(node.parent_id, []).append(node)
+        return children
+
+    def roots(self, **kwargs) -> typing.List[TreeNode]:
+        return self.children_map(**kwargs).get(None, [])
+
+    def children(self, category_id: int, **kwargs) -> typing.List[TreeNode]:
+        return self.children_map(**kwargs).get(category_id, [])
+
+    def nested(self, **kwargs) -> typing.List[typing.Tuple[TreeNode, list]]:
+        """Return (node, its nested children) pairs of the roots for recursive rendering."""
+        children = self.children_map(**kwargs)
+
+        def nest(parent_id):
+            return [(node, nest(node.id)) for node in children.get(parent_id, [])]
+
+        return nest(None)
+
+    # ------- Signal receivers -------
+    def _page_changed(self, instance, **kwargs):
+        # page proxies are senders too, so we listen all the models
+        if (
+            isinstance(instance, Page)
+            and instance.related_model_name == self.category_model._meta.db_table
+        ):
+            self.version.renew()
+
+    def _receivers(self):
+        return [
+            (post_save, self.version.renew, self.category_model),
+            (post_delete, self.version.renew, self.category_model),
+            (post_save, self._page_changed, None),
+            (post_delete, self._page_changed, None),
+        ]
+
+    def _dispatch_prefix(self) -> str:
+        return f'catalog.tree.{self.category_model._meta.db_table}'
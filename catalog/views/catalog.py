@@ -12,14 +12,26 @@ class CategoryTree(CustomPageView):
 
     template_name = 'catalog/catalog.html'
     category_model = None
+    # hide categories without active products.
+    # It requires connected `catalog.counts.ProductsCounts`.
+    hide_empty = False
+    # `catalog.tree.TreeSnapshot` instance. The view renders it without db queries.
+    tree = None
 
     def get_context_data(self, **kwargs):
         assert self.category_model, 'Need define category_model field'
         context = super(CategoryTree, self).get_context_data(**kwargs)
 
+        if self.tree:
+            return {
+                **context,
+                'tree': self.tree.nested(active=True, hide_empty=self.hide_empty),
+            }
+
+        nodes = self.category_model.objects.active()
         return {
             **context,
-            'nodes': self.category_model.objects.active()
+            'nodes': nodes.with_products() if self.hide_empty else nodes,
         }
 
 
@@ -317,23 +317,23 @@ class Tree(View, MultipleObjectMixin):
     category's products.
     """
     model = None
+    # `catalog.tree.TreeSnapshot` instance.
+    # The view serves categories from it without db queries.
+    tree = None
 
     # Page model names for reversing url.
     CATEGORY_PAGE_MODEL_NAME = 'categorypage'
     PRODUCT_PAGE_MODEL_NAME = 'productpage'
 
-    def prepare_for_js_tree(self, entities):
-        if not entities.exists():
-            return {'text': 'This Category has no Products.'}
-
-        is_category = isinstance(entities.first(), self.model)
-        urlconf = 'admin:{}_{}_change'.format(
+    def get_urlconf(self, is_category: bool) -> str:
+        return 'admin:{}_{}_change'.format(
             self.model._meta.app_label,
             self.CATEGORY_PAGE_MODEL_NAME if is_category else self.PRODUCT_PAGE_MODEL_NAME
         )
 
+    def prepare_entity(self, entity, is_category: bool, urlconf: str) -> dict:
         # jsTree has restriction on the field's names.
-        return [{
+        return {
            'id': entity.id,
            'text': entity.get_admin_tree_title(),
            'children': is_category,  # if False, then lazy load switch off
@@ -342,7 +342,24 @@ class Tree(View, MultipleObjectMixin):
                'href-admin-page': reverse(urlconf, args=(entity.page_id,)),
                'search-term': entity.name,
            }
-        } for entity in entities.iterator()]
+        }
+
+    def prepare_for_js_tree(self, entities):
+        if not entities.exists():
+            return {'text': 'This Category has no Products.'}
+
+        is_category = isinstance(entities.first(), self.model)
+        urlconf = self.get_urlconf(is_category)
+        return [
+            self.prepare_entity(entity, is_category, urlconf)
+            for entity in entities.iterator()
+        ]
+
+    def get_tree_nodes(self, category_id=None) -> list:
+        """Return the category's children or root categories from the tree snapshot."""
+        if not category_id:
+            return sorted(self.tree.roots(), key=lambda node: node.position)
+        return self.tree.children(int(category_id))
 
     def get_queryset(self, category_id=None, *args, **kwargs):
         if not category_id:
@@ -356,6 +373,13 @@ class Tree(View, MultipleObjectMixin):
 
     def get(self, request, *args, **kwargs):
         category_id = request.GET.get('id')
+        nodes = self.get_tree_nodes(category_id) if self.tree else []
+        if nodes:
+            urlconf = self.get_urlconf(is_category=True)
+            return JsonResponse([
+                self.prepare_entity(node, True, urlconf) for node in nodes
+            ], safe=False)
+
         entities = self.get_queryset(category_id=category_id)
 
         return JsonResponse(self.prepare_for_js_tree(entities), safe=False)
@@ -0,0 +1,117 @@
+"""
+Pre-generate sorl thumbnails for Image records.
+
+Thumbnails are listed at `IMAGES_THUMBNAILS` setting.
+Interrupted run can be resumed with `--from-id` option:
+the command prints the last processed image id after every batch.
+"""
+
+import multiprocessing
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from images.models import Image
+from images.thumbnails import get_thumbnails, merge_values, render, write_kvstore
+
+
+class Command(BaseCommand):
+
+    help = 'Generate thumbnails for images in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-id', type=int, default=0,
+            help='Process images with id greater or equal to this one.',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Max images count to process.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Worker processes count. Pass 1 to render in the current process.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Images count written to the key value store at once.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', default=False,
+            help='Print the summary without rendering.',
+        )
+
+    def get_images(self, from_id, limit):
+        images = (
+            Image.objects
+            .filter(id__gte=from_id)
+            .exclude(image='')
+            .order_by('id')
+            .values_list('id', 'image')
+        )
+        return images[:limit] if limit is not None else images
+
+    def batches(self, images, batch_size):
+        last_id = -1
+        while True:
+            batch = list(images.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1][0]
+
+    def summary(self, images, thumbnails):
+        ids = [id_ for id_, _ in images]
+        if not ids:
+            self.stdout.write('No images to process.')
+            return
+        self.stdout.write(
+            f'{len(ids)} images with ids from {ids[0]} to {ids[-1]}.'
+            f' {len(ids) * len(thumbnails)} thumbnails to generate.'
+        )
+
+    def handle(self, *args, **options):
+        thumbnails = get_thumbnails()
+        if not thumbnails:
+            raise CommandError('Define thumbnails list at IMAGES_THUMBNAILS setting.')
+
+        images = self.get_images(options['from_id'], options['limit'])
+        if options['dry_run']:
+            self.summary(images, thumbnails)
+            return
+
+        # sliced queryset can't be filtered any more. So fix the ids range first.
+        if options['limit'] is not None:
+            ids = [id_ for id_, _ in images]
+            images = Image.objects.filter(id__in=ids).order_by('id').values_list('id', 'image')
+
+        do_render = partial(render, thumbnails=thumbnails)
+        pool = None
+        if options['workers'] > 1:
+            # forked workers should not share the parent's db connections
+            connections.close_all()
+            pool = multiprocessing.Pool(options['workers'])
+        map_ = pool.imap if pool else map
+
+        images_count = failed_count = 0
+        try:
+            for batch in self.batches(images, options['batch_size']):
+                rendered = list(map_(do_render, batch))
+                write_kvstore(merge_values(
+                    values for _, values in rendered if values is not None
+                ))
+                images_count += len(rendered)
+                failed_count += sum(values is None for _, values in rendered)
+                self.stdout.write(
+                    f'Processed {images_count} images. Last id: {rendered[-1][0]}.'
+                )
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        self.stdout.write(
+            f'Generated thumbnails for {images_count - failed_count} images.'
+            f' Skipped {failed_count} broken images, see the log for their ids.'
+        )
@@ -1,26 +1,93 @@
 import hashlib
 import os
+import typing
 
+from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.core.files import File
 from django.db import models
+from django.db.models.fields import files
 from django.utils.translation import ugettext_lazy as _
 from sorl import thumbnail
 from sorl.thumbnail import delete
 
+HASH_CHUNK_SIZE = 64 * 2 ** 10  # bytes
+
+
+def file_hash(file) -> str:
+    """
+    Calculate md5 hash of the file content.
+
+    The file is read by chunks, so memory usage doesn't depend on the file size.
+    The file is rewound after reading.
+    """
+    file = file if isinstance(file, File) else File(file)
+    hash_ = hashlib.md5()
+    # `File.chunks` rewinds the file before reading
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        hash_.update(chunk)
+    file.seek(0)
+    return hash_.hexdigest()
+
+
+class ImageFieldFile(files.ImageFieldFile):
+
+    def save(self, name, content, save=True):
+        """
+        Reloaded this method to reuse stored files with the same content.
+
+        File name contains content hash, so the same name means the same content.
+        See `ImageField.generate_filename`.
+        """
+        if not self.field.is_dedupe:
+            return super().save(name, content, save)
+
+        name = self.field.generate_filename(self.instance, name)
+        if not self.storage.exists(name):
+            name = self.storage.save(name, content, max_length=self.field.max_length)
+        self.name = name
+        setattr(self.instance, self.field.name, self.name)
+        self._committed = True
+
+        if save:
+            self.instance.save()
+    save.alters_data = True
+
 
 class ImageField(thumbnail.ImageField):
 
+    attr_class = ImageFieldFile
+
+    def __init__(self, *args, dedupe: bool=None, **kwargs):
+        """
+        :param dedupe: Reuse stored files with the same content.
+            `IMAGES_DEDUPE` setting by default.
+        """
+        self.dedupe = dedupe
+        super().__init__(*args, **kwargs)
+
+    @property
+    def is_dedupe(self) -> bool:
+        if self.dedupe is None:
+            return getattr(settings, 'IMAGES_DEDUPE', False)
+        return self.dedupe
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dedupe is not None:
+            kwargs['dedupe'] = self.dedupe
+        return name, path, args, kwargs
+
     def generate_filename(self, instance, filename):
         """Reloaded this method. See `django.db.models.fields.files.FileField`."""
         f = getattr(instance, self.name).file
         _, extension = os.path.splitext(filename)
-        file_hash = hashlib.md5(f.read()).hexdigest()
         models_folder_name = type(instance.model).__name__.lower()
         filename = '/'.join([
             models_folder_name,
             str(instance.model.pk),
-            file_hash + extension
+            file_hash(f) + extension
         ])
         return self.storage.generate_filename(filename)
 
@@ -28,19 +95,22 @@ class ImageField(thumbnail.ImageField):
 class ImageQuerySet(models.QuerySet):
 
     def get_main_images_by_pages(self, pages) -> dict:
+        """Return page -> main image pairs with the single query."""
         pages = list(pages)
+        if not pages:
+            return {}
 
-        images_query = (
-            self.filter(object_id__in=[page.id for page in pages], is_main=True)
+        images = self.filter(
+            content_type=ContentType.objects.get_for_model(pages[0]),
+            object_id__in=[page.id for page in pages],
+            is_main=True,
         )
-
-        if not images_query.exists():
-            return {}
+        images_by_ids = {image.object_id: image for image in images}
 
         return {
-            page: image
-            for image in images_query for page in pages
-            if image.object_id == page.id
+            page: images_by_ids[page.id]
+            for page in pages
+            if page.id in images_by_ids
         }
 
 
@@ -98,10 +168,14 @@ class Image(models.Model):
             self.is_main = True
 
         super(Image, self).save(*args, **kwargs)
+        self.model.update_main_image(self)
 
     def delete(self, *args, **kwargs):
+        # models with the main image pointer drop it by `on_delete=SET_NULL`
         super(Image, self).delete(*args, **kwargs)
-        delete(self.image)
+        # deduplicated files may be shared between images
+        if not Image.objects.filter(image=self.image.name).exists():
+            delete(self.image)
 
 
 class ImageMixin(models.Model):
@@ -127,5 +201,33 @@ class ImageMixin(models.Model):
 
     @property
     def main_image(self) -> models.ImageField:
-        main_image = self.images.filter(is_main=True)
-        return main_image.first().image if main_image.exists() else None
+        # see `prefetch_main_images` function
+        if hasattr(self, '_prefetched_main_image'):
+            return self._prefetched_main_image
+        return self.get_main_image()
+
+    def get_main_image(self) -> models.ImageField:
+        main_image = self.images.filter(is_main=True).first()
+        return main_image.image if main_image else None
+
+    def update_main_image(self, image: Image):
+        """
+        Image calls it after saving.
+
+        Override it to store the main image pointer.
+        See `pages.models.Page` for example.
+        """
+
+
+def prefetch_main_images(objects: typing.Iterable[ImageMixin]) -> typing.List[ImageMixin]:
+    """
+    Attach main images to the given objects with the single query.
+
+    `main_image` property of the returned objects costs no queries.
+    """
+    objects = list(objects)
+    images = Image.objects.get_main_images_by_pages(objects)
+    for object_ in objects:
+        image = images.get(object_)
+        object_._prefetched_main_image = image.image if image else None
+    return objects
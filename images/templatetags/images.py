@@ -2,6 +2,8 @@ from django import template
 from django.conf import settings
 from django.contrib.staticfiles.storage import staticfiles_storage as storage
 
+from images.models import prefetch_main_images as prefetch
+
 
 register = template.Library()
 
@@ -25,3 +27,14 @@ def placeholder_image_url():
         raise e
     except AttributeError as e:
         raise e
+
+
+@register.simple_tag
+def prefetch_main_images(objects):
+    """
+    Attach main images to the objects in bulk.
+
+    Usage: `{% prefetch_main_images pages as pages %}`.
+    Then `page.main_image` costs no db queries inside the loop over pages.
+    """
+    return prefetch(objects)
@@ -0,0 +1,134 @@
+"""
+Thumbnails pre-generation for Image records.
+
+sorl generates thumbnails lazily on the first page view.
+This module renders them ahead in worker processes.
+Workers don't touch the db: they collect key value store entries in memory
+and the main process writes them to the real key value store in bulk.
+"""
+
+import json
+import logging
+import typing
+
+from django.conf import settings
+from django.db import models
+from django.utils.functional import empty
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.kvstores.base import KVStoreBase
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+# Geometry and sorl options pairs. Override it with `IMAGES_THUMBNAILS` setting.
+# Example: `[('200x200', {'crop': 'center'}), ('x600', {'format': 'PNG'})]`.
+DEFAULT_THUMBNAILS = []
+
+ImageTask = typing.Tuple[int, str]  # image id, image file name
+KVValues = typing.Dict[str, str]  # raw keys and serialized values
+
+logger = logging.getLogger(__name__)
+
+
+def get_thumbnails() -> typing.List[typing.Tuple[str, dict]]:
+    return getattr(settings, 'IMAGES_THUMBNAILS', DEFAULT_THUMBNAILS)
+
+
+class CollectedKVStore(KVStoreBase):
+    """In-memory key value store. Collects entries to write them later in bulk."""
+
+    def __init__(self):
+        super().__init__()
+        self.values: KVValues = {}
+
+    def _get_raw(self, key):
+        return self.values.get(key)
+
+    def _set_raw(self, key, value):
+        self.values[key] = value
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        return [key for key in self.values if key.startswith(prefix)]
+
+
+def render(
+    task: ImageTask, thumbnails: typing.List[typing.Tuple[str, dict]]
+) -> typing.Tuple[int, typing.Optional[KVValues]]:
+    """
+    Render all the thumbnails of the image and return collected kvstore entries.
+
+    Broken or missing source files are logged and skipped with None entries,
+    so they don't stop the whole run.
+    """
+    image_id, name = task
+    real_kvstore, default.kvstore = default.kvstore, CollectedKVStore()
+    try:
+        for geometry, options in thumbnails:
+            default.backend.get_thumbnail(name, geometry, **options)
+        return image_id, default.kvstore.values
+    except Exception:
+        logger.exception(f'Failed to render thumbnails of the image {image_id}: {name}')
+        return image_id, None
+    finally:
+        default.kvstore = real_kvstore
+
+
+def _is_thumbnails_key(key: str) -> bool:
+    return '||thumbnails||' in key
+
+
+def _merge(key: str, old: typing.Optional[str], new: str) -> str:
+    """Union the source's thumbnails lists. Take new values for other keys."""
+    if old is None or not _is_thumbnails_key(key):
+        return new
+    return json.dumps(sorted(set(json.loads(old)) | set(json.loads(new))))
+
+
+def merge_values(values: typing.Iterable[KVValues]) -> KVValues:
+    merged = {}
+    for value in values:
+        for key, raw in value.items():
+            merged[key] = _merge(key, merged.get(key), raw)
+    return merged
+
+
+def write_kvstore(values: KVValues):
+    """
+    Write the collected entries to the real key value store.
+
+    The default cached db store gets a few queries for the whole batch.
+    Other stores are written by keys.
+    """
+    kvstore = default.kvstore
+    if kvstore._wrapped is empty:
+        kvstore._setup()
+    if not isinstance(kvstore._wrapped, CachedDBKVStore):
+        for key, value in values.items():
+            kvstore._set_raw(key, _merge(key, kvstore._get_raw(key), value))
+        return
+
+    existing = dict(
+        KVStoreModel.objects
+        .filter(key__in=list(values))
+        .values_list('key', 'value')
+    )
+    values = {
+        key: _merge(key, existing.get(key), value)
+        for key, value in values.items()
+    }
+    KVStoreModel.objects.bulk_create([
+        KVStoreModel(key=key, value=value)
+        for key, value in values.items()
+        if key not in existing
+    ])
+    changed = [key for key in existing if existing[key] != values[key]]
+    if changed:
+        KVStoreModel.objects.filter(key__in=changed).update(value=models.Case(
+            *[models.When(key=key, then=models.Value(values[key])) for key in changed],
+            output_field=models.TextField(),
+        ))
+    kvstore.cache.set_many(values, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
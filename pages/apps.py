@@ -1,7 +1,21 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 
 class PagesConfig(AppConfig):
     name = 'pages'
     verbose_name = _('pages')
+
+    def ready(self):
+        from pages import memo
+        from pages.models import renew_display_version, renew_tree_version
+        request_started.connect(memo.open_scope, dispatch_uid='pages_memo_open_scope')
+        request_finished.connect(memo.close_scope, dispatch_uid='pages_memo_close_scope')
+        post_save.connect(renew_tree_version, dispatch_uid='pages_renew_tree_version_on_save')
+        post_delete.connect(renew_tree_version, dispatch_uid='pages_renew_tree_version_on_delete')
+        post_save.connect(renew_display_version, dispatch_uid='pages_renew_display_version_on_save')
+        post_delete.connect(
+            renew_display_version, dispatch_uid='pages_renew_display_version_on_delete',
+        )
@@ -0,0 +1,68 @@
+"""
+Cached breadcrumbs chains of pages.
+
+The chain is the index page and the active ancestors of the page,
+optionally with siblings of every crumb. It's built with two or three queries
+and stored in the django cache under the pages tree version,
+so any page edit makes all the chains stale.
+
+>>> [crumb.model.url for crumb in get_breadcrumbs(page, with_siblings=True)]
+['/', '/catalog/', '/catalog/categories/lamps/']
+"""
+
+import typing
+
+from django.core.cache import cache
+
+from pages import logic
+from pages.cache import get_timeout, tree_version
+from pages.models import CustomPage, Page
+
+# Chain of (page, its siblings or None, if they are not built) pairs.
+Chain = typing.List[typing.Tuple[Page, typing.Optional[typing.List[Page]]]]
+
+# index page by the tree version it was fetched at
+_index_page: typing.Dict[str, Page] = {}
+
+
+def get_index_page() -> Page:
+    """Return the index page. It's memoized in the process till the tree changes."""
+    version = tree_version.value()
+    if version not in _index_page:
+        _index_page.clear()
+        _index_page[version] = CustomPage.objects.get(slug='')
+    return _index_page[version]
+
+
+def build_chain(page: Page, with_siblings=False) -> Chain:
+    ancestors = list(page.get_ancestors(include_self=True).active())
+    if not with_siblings:
+        return [(get_index_page(), None)] + [(ancestor, None) for ancestor in ancestors]
+
+    siblings = {}
+    children = (
+        Page.objects.active()
+        .filter(parent_id__in=[ancestor.parent_id for ancestor in ancestors])
+        .order_by('tree_id', 'lft')
+    )
+    for child in children:
+        siblings.setdefault(child.parent_id, []).append(child)
+
+    # root pages have no siblings, as the index page does
+    return [(get_index_page(), [])] + [
+        (ancestor, [
+            sibling for sibling in siblings.get(ancestor.parent_id, [])
+            if sibling.id != ancestor.id
+        ] if ancestor.parent_id else [])
+        for ancestor in ancestors
+    ]
+
+
+def get_breadcrumbs(page: Page, with_siblings=False, timeout=None) -> typing.List[logic.Page]:
+    """:param timeout: Chain cache timeout. `PAGES_CACHE_TIMEOUT` setting by default."""
+    key = tree_version.key('breadcrumbs', page.id, int(with_siblings))
+    chain = cache.get(key)
+    if chain is None:
+        chain = build_chain(page, with_siblings)
+        cache.set(key, chain, get_timeout() if timeout is None else timeout)
+    return [logic.Page(model=model, siblings=siblings) for model, siblings in chain]
@@ -0,0 +1,53 @@
+import typing
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Renewed versions leave the old keys behind, so data cached under
+# the versions should expire. Override it with `PAGES_CACHE_TIMEOUT` setting.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Version:
+    """
+    Version of some cached data shared between processes.
+
+    The version lives in the django cache.
+    Renew it to make all the keys built with the old version unreachable.
+    Evicted version leads to a new version too.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f'<cache.Version name={self.name}>'
+
+    def value(self) -> str:
+        return cache.get_or_set(self.name, lambda: uuid4().hex, timeout=None)
+
+    def renew(self, *args, **kwargs):
+        """Renew the version. Args allow to connect the method to signals."""
+        cache.set(self.name, uuid4().hex, timeout=None)
+
+    def prefix(self) -> str:
+        """Return the keys prefix. Read it once to build many keys with one cache query."""
+        return f'{self.name}:{self.value()}'
+
+    def key(self, *parts: typing.Any) -> str:
+        return ':'.join(map(str, [self.prefix(), *parts]))
+
+
+def get_timeout() -> int:
+    return getattr(settings, 'PAGES_CACHE_TIMEOUT', CACHE_TIMEOUT)
+
+
+# Version of the pages tree data: structure, urls, titles and activity.
+# `PagesConfig` renews it on every page saving and deletion.
+tree_version = Version('pages:tree:version')
+
+# Version of rendered db templates fields of pages. See `pages.display`.
+# `PagesConfig` renews it on pages and page templates editing.
+# Apps with other template context data renew it by themselves.
+display_version = Version('pages:display:version')
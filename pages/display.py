@@ -3,7 +3,36 @@ Views processing db based templates.
 This view are outside of MTV concept.
 Responsible only for rendering given context data with db preserved text template.
 """
+from django.core.cache import cache
+
 from pages import typing
+from pages.cache import display_version, get_timeout
+
+# Pass a context with the key to cache rendered template fields by the key's value.
+# The value should identify the context data besides the page,
+# for example, sorted ids of the page's tags.
+CACHE_KEY = 'display_cache_key'
+# Fields rendered by the page template. See `pages.models.PageTemplate`
+TEMPLATE_FIELDS = ['h1', 'keywords', 'description', 'title', 'seo_text']
+
+
+def render_fields(page: 'pages.models.Page', context: typing.ContextDict) -> typing.Dict[str, str]:
+    """Render all the template fields of the page at once. Cache them by the context key."""
+    key = display_version.key(page.id, page.template_id, context[CACHE_KEY])
+    fields = cache.get(key)
+    if fields is None:
+        fields = {
+            field: page.template.render_field(field, context=context)
+            for field in TEMPLATE_FIELDS
+        }
+        cache.set(key, fields, get_timeout())
+    return fields
+
+
+def render_field(page: 'pages.models.Page', field: str, context: typing.ContextDict) -> str:
+    if CACHE_KEY in context and field in TEMPLATE_FIELDS:
+        return render_fields(page, context)[field]
+    return page.template.render_field(field, context=context)
 
 
 class Page:
@@ -44,7 +73,8 @@ class Page:
 
     def render(self, field: str):
         return (
-            self._page.template.render_field(field, context=self._context)
-            if self._page.template
+            render_field(self._page, field, self._context)
+            # the id doesn't query the template
+            if self._page.template_id
             else getattr(self._page, field)
         )
@@ -4,10 +4,12 @@ from pages import models
 
 
 class Page:
-    def __init__(self, model: models.Page):
+    def __init__(self, model: models.Page, siblings: typing.List[models.Page]=None):
         # "record" is much more good field name, i suppose.
         # But "model" is Django standard.
         self.model = model
+        # precomputed siblings. See `pages.breadcrumbs`
+        self._siblings = siblings
 
     def __str__(self):
         return f'<logic.Page: {str(self.model)}>'
@@ -16,7 +18,9 @@ class Page:
         return f'<logic.Page: {str(self.model)}>'
 
     @property
-    def siblings(self) -> models.PageQuerySet:
+    def siblings(self) -> typing.Union[models.PageQuerySet, typing.List[models.Page]]:
+        if self._siblings is not None:
+            return self._siblings
         return self.model.parent.children.active().exclude(id=self.model.id)
 
     @property
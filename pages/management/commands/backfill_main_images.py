@@ -0,0 +1,61 @@
+"""Fill `Page.main_image_record` pointer for existing pages."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from images.models import Image
+from pages.models import Page
+
+
+class Command(BaseCommand):
+
+    help = 'Fill the main image pointer of pages in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Pages count updated by one query.',
+        )
+
+    def backfill(self, page_ids, content_type) -> int:
+        main_images = dict(
+            Image.objects
+            .filter(content_type=content_type, object_id__in=page_ids, is_main=True)
+            .values_list('object_id', 'id')
+        )
+        pointer = models.Case(
+            *[
+                models.When(id=page_id, then=models.Value(image_id))
+                for page_id, image_id in main_images.items()
+            ],
+            default=None,
+            output_field=models.IntegerField(),
+        ) if main_images else None
+
+        with transaction.atomic():
+            Page.objects.filter(id__in=page_ids).update(main_image_record=pointer)
+        return len(main_images)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        content_type = ContentType.objects.get_for_model(Page)
+        pages_count = images_count = 0
+        last_id = 0
+
+        while True:
+            page_ids = list(
+                Page.objects
+                .filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not page_ids:
+                break
+            images_count += self.backfill(page_ids, content_type)
+            pages_count += len(page_ids)
+            last_id = page_ids[-1]
+
+        self.stdout.write(
+            f'Updated {pages_count} pages. {images_count} of them have main images.'
+        )
@@ -0,0 +1,91 @@
+"""Fill `Page.url_path` for existing pages."""
+
+import typing
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from pages.cache import tree_version
+from pages.models import (
+    Page, reverse_custom_page, reverse_flat_page, stored_url, update_url_paths,
+)
+
+
+class Command(BaseCommand):
+
+    help = 'Resolve and store url paths of pages in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Pages count resolved and updated at once.',
+        )
+
+    def resolve_models_urls(
+        self, model_pages: typing.Dict[str, typing.List[int]],
+    ) -> typing.Dict[int, str]:
+        """Resolve urls of model pages with one query per related model."""
+        related_models = {
+            relation.get_accessor_name(): relation.related_model
+            for relation in Page._meta.related_objects
+            if relation.one_to_one
+        }
+        urls = {}
+        for related_model_name, page_ids in model_pages.items():
+            model = related_models.get(related_model_name)
+            if not hasattr(model, 'get_absolute_url'):
+                continue
+            entities = model.objects.filter(page_id__in=page_ids).select_related('page')
+            for entity in entities:
+                urls[entity.page_id] = stored_url(entity.get_absolute_url)
+        return urls
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # active slugs of the pages with descendants. Flat descendants urls consist of them
+        slugs: typing.Dict[int, tuple] = {}
+        pages_count = empty_count = 0
+        last_position = (0, 0)
+
+        while True:
+            tree_id, lft = last_position
+            pages = list(
+                Page.objects
+                .filter(models.Q(tree_id__gt=tree_id) | models.Q(tree_id=tree_id, lft__gt=lft))
+                .order_by('tree_id', 'lft')
+                .values_list(
+                    'id', 'parent_id', 'type', 'slug', 'is_active',
+                    'related_model_name', 'tree_id', 'lft', 'rght',
+                )[:batch_size]
+            )
+            if not pages:
+                break
+
+            paths = {}
+            model_pages = {}
+            for id_, parent_id, type_, slug, is_active, related_model_name, _, lft, rght in pages:
+                page_slugs = slugs.get(parent_id, ()) + ((slug, ) if is_active else ())
+                if rght - lft > 1:
+                    slugs[id_] = page_slugs
+
+                if type_ == Page.FLAT_TYPE:
+                    paths[id_] = stored_url(partial(reverse_flat_page, page_slugs))
+                elif type_ == Page.CUSTOM_TYPE:
+                    paths[id_] = stored_url(partial(reverse_custom_page, slug))
+                else:
+                    paths[id_] = ''
+                    model_pages.setdefault(related_model_name, []).append(id_)
+            paths.update(self.resolve_models_urls(model_pages))
+
+            with transaction.atomic():
+                update_url_paths(paths, batch_size)
+            pages_count += len(paths)
+            empty_count += sum(not path for path in paths.values())
+            last_position = pages[-1][6:8]
+
+        # updates bypass signals
+        tree_version.renew()
+        self.stdout.write(
+            f'Updated {pages_count} pages. {empty_count} of them have no url path.'
+        )
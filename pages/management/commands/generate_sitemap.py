@@ -0,0 +1,46 @@
+"""Write gzipped XML sitemaps of active pages and their index."""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pages.sitemap import MAX_URLS, iter_urls, write_sitemaps
+
+
+class Command(BaseCommand):
+
+    help = 'Write sitemaps of active pages split by the urls limit and their index file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=settings.STATIC_ROOT,
+            help='Directory for the sitemaps files. STATIC_ROOT by default.',
+        )
+        parser.add_argument(
+            '--base-url', default=settings.BASE_URL,
+            help='Url prefix of the pages paths. BASE_URL setting by default.',
+        )
+        parser.add_argument('--name', default='sitemap', help='Index file name without extension.')
+        parser.add_argument(
+            '--max-urls', type=int, default=MAX_URLS,
+            help='Urls count of one sitemap file.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Pages count read from the db at once.',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        names = write_sitemaps(
+            directory,
+            options['base_url'],
+            iter_urls(chunk_size=options['chunk_size']),
+            name=options['name'],
+            max_urls=options['max_urls'],
+        )
+        self.stdout.write(
+            f'Wrote {len(names) - 1} sitemaps and {names[-1]} index to {directory}.'
+        )
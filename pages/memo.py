@@ -0,0 +1,107 @@
+"""
+Request-scoped memoization.
+
+Memoized values live until the end of the current request.
+So they don't pin requests, contexts and querysets in the process memory
+like `functools.lru_cache` does.
+
+`PagesConfig` opens a scope on `request_started` signal
+and closes it on `request_finished`. Use `scope` context manager
+to memoize values outside of requests. Without an active scope
+memoized functions are just called.
+
+>>> @memoize
+... def products_count(category):
+...     return category.products.count()
+>>> with scope():
+...     products_count(category), products_count(category)  # only one query
+>>> stats.hits['products_count']
+1
+"""
+
+import threading
+import typing
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Stats:
+    """Hits and misses counters of memoized functions by their qualified names."""
+
+    def __init__(self):
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def __repr__(self):
+        return f'<memo.Stats hits={sum(self.hits.values())} misses={sum(self.misses.values())}>'
+
+    def as_dict(self) -> typing.Dict[str, typing.Dict[str, int]]:
+        return {
+            name: {'hits': self.hits[name], 'misses': self.misses[name]}
+            for name in sorted(self.hits.keys() | self.misses.keys())
+        }
+
+    def reset(self):
+        self.hits.clear()
+        self.misses.clear()
+
+
+stats = Stats()
+_local = threading.local()
+
+
+def _scopes() -> typing.List[dict]:
+    if not hasattr(_local, 'scopes'):
+        _local.scopes = []
+    return _local.scopes
+
+
+def open_scope(*args, **kwargs):
+    """Open a new memo scope. Args allow to connect the function to signals."""
+    _scopes().append({})
+
+
+def close_scope(*args, **kwargs):
+    """Close the current memo scope and free its values."""
+    scopes = _scopes()
+    if scopes:
+        scopes.pop()
+
+
+@contextmanager
+def scope():
+    open_scope()
+    try:
+        yield
+    finally:
+        close_scope()
+
+
+def memoize(func):
+    """
+    Memoize the function's result in the current scope.
+
+    Arguments should be hashable. Querysets and context objects are hashed
+    by identity, so memoized values are reused for the same objects only.
+    Use it under `property` decorator for properties.
+    """
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        scopes = _scopes()
+        if not scopes:
+            return func(*args, **kwargs)
+
+        values = scopes[-1]
+        key = (name, args, tuple(sorted(kwargs.items())))
+        if key in values:
+            stats.hits[name] += 1
+            return values[key]
+
+        stats.misses[name] += 1
+        values[key] = func(*args, **kwargs)
+        return values[key]
+
+    return wrapper
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 06:11
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('images', '0007_custom_image_field'),
+        ('pages', '0018_page_template_increase_name_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='main_image_record',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='images.Image'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 06:27
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0019_page_main_image_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='url_path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=2000),
+        ),
+    ]
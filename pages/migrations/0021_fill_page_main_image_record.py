@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def fill_main_image_record(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Image = apps.get_model('images', 'Image')
+    Page = apps.get_model('pages', 'Page')
+
+    content_type = ContentType.objects.filter(app_label='pages', model='page').first()
+    if not content_type:
+        # new databases have no pages images yet
+        return
+
+    main_images = (
+        Image.objects
+        .filter(content_type=content_type, object_id=OuterRef('id'), is_main=True)
+        .order_by('id')
+        .values('id')
+    )
+    Page.objects.update(main_image_record=Subquery(main_images[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('images', '0007_custom_image_field'),
+        ('pages', '0020_page_url_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_main_image_record, migrations.RunPython.noop),
+    ]
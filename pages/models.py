@@ -1,19 +1,23 @@
+import typing
 from datetime import date
+from functools import partial
 from itertools import chain
 
 import mptt
 from django.core.exceptions import ValidationError
-from django.core.urlresolvers import reverse
+from django.core.urlresolvers import NoReverseMatch, reverse
 from django.db import models, transaction
+from django.db.models.signals import post_save
 from django.template import Template
 from django.template.defaultfilters import slugify
 from django.template.exceptions import TemplateSyntaxError
 from django.utils.translation import ugettext_lazy as _
 from unidecode import unidecode
 
-from images.models import ImageMixin
+from images.models import Image, ImageMixin
 from pages import display
-from pages.utils import render_str
+from pages.cache import display_version, tree_version
+from pages.utils import compiled_templates, render_str
 
 
 def validate_template(value):
@@ -26,7 +30,36 @@ def validate_template(value):
         )
 
 
-class PageTemplate(models.Model):
+class LoadedValuesMixin:
+    """Keep field values loaded from the db to find changed fields without queries."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def has_changes(self, fields: typing.Iterable[str]) -> bool:
+        """Check the fields changed since loading. New instances have changes."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            loaded[name] != getattr(self, name) if name in loaded
+            # deferred fields are changed only by assigning them
+            else name in self.__dict__
+            for name in fields
+        )
+
+
+class PageTemplate(LoadedValuesMixin, models.Model):
 
     name = models.CharField(blank=False, max_length=1000, unique=True)
     h1 = models.CharField(
@@ -57,6 +90,71 @@ class PageTemplate(models.Model):
     def render_field(self, field: str, context: dict) -> str:
         return render_str(getattr(self, field), context)
 
+    def render_pages(
+        self, pages: typing.Iterable['Page'], fields: typing.Iterable[str]=display.TEMPLATE_FIELDS,
+    ) -> typing.Dict[int, typing.Dict[str, str]]:
+        """
+        Render the fields for the pages sharing the template.
+
+        Every field is compiled once for all the pages.
+        :return: page id -> its rendered fields pairs.
+        """
+        templates = {field: compiled_templates.get(getattr(self, field)) for field in fields}
+        rendered = {}
+        for page in pages:
+            context = page.get_template_render_context()
+            rendered[page.id] = {
+                field: template.render(context) for field, template in templates.items()
+            }
+        return rendered
+
+
+def render_pages_fields(
+    pages: typing.Iterable['Page'], fields: typing.Iterable[str]=display.TEMPLATE_FIELDS,
+) -> typing.List['Page']:
+    """
+    Render template fields of the listed pages with one templates query.
+
+    Pages keep rendered fields, so their `display_*` properties don't render them again.
+    The fields are not stored in `display.CACHE_KEY` cache,
+    so the page's own view renders them once more.
+    """
+    pages = list(pages)
+    templates = PageTemplate.objects.in_bulk({page.template_id for page in pages} - {None})
+    for template_id, template in templates.items():
+        template_pages = [page for page in pages if page.template_id == template_id]
+        rendered = template.render_pages(template_pages, fields)
+        for page in template_pages:
+            page.rendered_fields = rendered[page.id]
+    return pages
+
+
+def reverse_flat_page(slugs: typing.Sequence[str]) -> str:
+    return reverse('pages:flat_page', args=slugs)
+
+
+def reverse_custom_page(slug: str) -> str:
+    return reverse(CustomPage.ROUTE, args=(slug, )) if slug else reverse('index')
+
+
+def stored_url(resolve: typing.Callable[[], str]) -> str:
+    """Return the url to store. Not routable pages have no stored url."""
+    try:
+        return resolve()
+    except NoReverseMatch:
+        return ''
+
+
+def update_url_paths(paths: typing.Dict[int, str], batch_size=1000):
+    """Store url paths of pages with one query per batch."""
+    ids = list(paths)
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        Page.objects.filter(id__in=batch).update(url_path=models.Case(
+            *[models.When(id=id_, then=models.Value(paths[id_])) for id_ in batch],
+            output_field=models.CharField(),
+        ))
+
 
 class PageQuerySet(mptt.querysets.TreeQuerySet):
     def active(self):
@@ -68,7 +166,7 @@ class PageManager(mptt.managers.TreeManager.from_queryset(PageQuerySet)):
         return self.get_queryset().active()
 
 
-class Page(mptt.models.MPTTModel, ImageMixin):
+class Page(LoadedValuesMixin, mptt.models.MPTTModel, ImageMixin):
     # pages with same templates (ex. news, about)
     FLAT_TYPE = 'flat'
     # pages with unique templates (ex. index, order)
@@ -80,6 +178,11 @@ class Page(mptt.models.MPTTModel, ImageMixin):
     # This field
     INDEX_PAGE_SLUG = ''
 
+    # Url of the page's subtree depends on these fields.
+    URL_PATH_FIELDS = ('parent_id', 'slug', 'is_active')
+    # fields of the tree data. See `pages.cache.tree_version`
+    TREE_FIELDS = (*URL_PATH_FIELDS, 'name', 'menu_title', 'position')
+
     objects = PageManager()
 
     display = display.Page()
@@ -137,6 +240,21 @@ class Page(mptt.models.MPTTModel, ImageMixin):
         verbose_name=_('page template')
     )
 
+    # Denormalized pointer to the main image. `Image.save` maintains it.
+    # The migration fills it for existing pages. `backfill_main_images` command refills it.
+    main_image_record = models.ForeignKey(
+        Image,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+    )
+
+    # Denormalized resolved url. `Page.save` maintains it for the page and its subtree.
+    # Use `backfill_url_paths` command to fill it for existing pages.
+    url_path = models.CharField(max_length=2000, blank=True, db_index=True, editable=False)
+
     @property
     def url(self):
         return self.get_absolute_url()
@@ -166,21 +284,76 @@ class Page(mptt.models.MPTTModel, ImageMixin):
         return self.slug
 
     def get_absolute_url(self):
+        """Return the stored url. Resolve it, if the page has no stored one."""
+        return self.url_path or self.resolve_url()
+
+    def resolve_url(self):
         """Different page types reverse different urls"""
         if self.is_model:
             return self.model.get_absolute_url()
 
         if self.is_custom:
-            return (
-                reverse(CustomPage.ROUTE, args=(self.slug, ))
-                if self.slug else reverse('index')
-            )
+            return reverse_custom_page(self.slug)
 
         if self.is_flat:
-            return reverse('pages:flat_page', args=self.get_ancestors_fields('slug'))
+            return reverse_flat_page(self.get_ancestors_fields('slug'))
 
         return '/'
 
+    def resolve_stored_url(self):
+        """Resolve the url to store. Model pages without routable saved models have no one."""
+        model = self.model
+        if self.is_model and not (
+            getattr(model, 'pk', None) and hasattr(model, 'get_absolute_url')
+        ):
+            return ''
+        return stored_url(self.resolve_url)
+
+    def update_url_paths(self, with_descendants=True):
+        """
+        Store url paths of the page and its flat descendants.
+
+        Flat pages urls consist of their active ancestors slugs,
+        so descendants are resolved from one tree query.
+        Urls of other page types don't depend on ancestors.
+        """
+        stored = {self.id: self.url_path}
+        if not with_descendants:
+            paths = {self.id: self.resolve_stored_url()}
+        else:
+            slugs = {self.id: self.get_ancestors_fields('slug')}
+            paths = {self.id: (
+                stored_url(partial(reverse_flat_page, slugs[self.id]))
+                if self.is_flat else self.resolve_stored_url()
+            )}
+            descendants = (
+                self.get_descendants()
+                # leaves of other types have no flat descendants
+                .filter(models.Q(type=self.FLAT_TYPE) | models.Q(rght__gt=models.F('lft') + 1))
+                .order_by('lft')
+                .values_list('id', 'parent_id', 'type', 'slug', 'is_active', 'url_path')
+            )
+            for id_, parent_id, type_, slug, is_active, url_path in descendants:
+                slugs[id_] = slugs[parent_id] + ((slug, ) if is_active else ())
+                if type_ == self.FLAT_TYPE:
+                    paths[id_] = stored_url(partial(reverse_flat_page, slugs[id_]))
+                    stored[id_] = url_path
+
+        update_url_paths({
+            id_: path for id_, path in paths.items() if path != stored[id_]
+        })
+        self.url_path = paths[self.id]
+
+    def get_stored_url_state(self) -> typing.Optional[tuple]:
+        if not self.id:
+            return None
+        return (
+            Page.objects
+            .filter(id=self.id)
+            .values_list(*self.URL_PATH_FIELDS)
+            .first()
+        )
+
     def save(self, *args, **kwargs):
         def update_slug():
             if self.slug or self.is_custom:
@@ -189,7 +362,12 @@ class Page(mptt.models.MPTTModel, ImageMixin):
             self.slug = slugify(unidecode(self.name.replace('.', '-').replace('+', '-')))
 
         update_slug()
+        stored_state = self.get_stored_url_state()
         super(Page, self).save(*args, **kwargs)
+        state = tuple(getattr(self, field) for field in self.URL_PATH_FIELDS)
+        self.update_url_paths(
+            with_descendants=stored_state is not None and stored_state != state,
+        )
 
     def get_ancestors_fields(self, *args, include_self=True) -> [[models.Field] or models.Field]:
         fields = tuple(
@@ -202,6 +380,19 @@ class Page(mptt.models.MPTTModel, ImageMixin):
 
         return fields
 
+    def get_main_image(self) -> models.ImageField:
+        # select related `main_image_record` to avoid the query
+        image = self.main_image_record
+        return image.image if image else None
+
+    def update_main_image(self, image: Image):
+        pages = Page.objects.filter(id=self.id)
+        if image.is_main:
+            pages.update(main_image_record=image)
+            self.main_image_record = image
+        elif pages.filter(main_image_record=image).update(main_image_record=None):
+            self.main_image_record = None
+
     def get_template_render_context(self):
         return {
             'page': self,
@@ -209,13 +400,15 @@ class Page(mptt.models.MPTTModel, ImageMixin):
 
     def display_attribute(self, name):
 
-        if not self.template:
+        if not self.template_id:
             return getattr(self, name) or self.name
 
-        return self.template.render_field(
-            field=name,
-            context=self.get_template_render_context(),
-        )
+        # fields rendered for many pages at once. See `render_pages_fields`
+        rendered_fields = getattr(self, 'rendered_fields', None)
+        if rendered_fields and name in rendered_fields:
+            return rendered_fields[name]
+
+        return display.render_field(self, name, self.get_template_render_context())
 
     @property
     def display_title(self):
@@ -242,6 +435,39 @@ class Page(mptt.models.MPTTModel, ImageMixin):
         return self.menu_title or self.name
 
 
+def renew_tree_version(instance, **kwargs):
+    # page proxies are senders too, so the receiver listens all the models
+    if not isinstance(instance, Page):
+        return
+    # edits of other fields, like seo texts, keep the tree caches
+    if kwargs.get('signal') is not post_save or instance.has_changes(Page.TREE_FIELDS):
+        tree_version.renew()
+
+
+def get_display_fields(instance: models.Model) -> typing.List[str]:
+    """Return the fields, that page templates may render."""
+    # mptt bookkeeping fields are changed by the tree moves, that change `parent_id` too.
+    # `url_path` is derived from the other fields
+    skipped = {'lft', 'rght', 'tree_id', 'level', 'url_path'} if isinstance(instance, Page) else ()
+    return [
+        field.attname for field in instance._meta.concrete_fields
+        if field.attname not in skipped
+    ]
+
+
+def renew_display_version(instance, **kwargs):
+    if isinstance(instance, Page):
+        # only pages with templates have rendered fields
+        loaded_template_id = getattr(instance, '_loaded_values', {}).get('template_id')
+        if not (instance.template_id or loaded_template_id):
+            return
+    elif not isinstance(instance, PageTemplate):
+        return
+    # saving without changes keeps the rendered fields cache
+    if kwargs.get('signal') is not post_save or instance.has_changes(get_display_fields(instance)):
+        display_version.renew()
+
+
 # ------- Managers -------
 class CustomPageManager(PageManager):
 
@@ -383,9 +609,15 @@ class PageMixin(models.Model):
 
             self.page.save()
 
+        def update_page_url():
+            # the model's url may depend on its saved fields
+            if self.page:
+                self.page.update_url_paths(with_descendants=False)
+
         update_page_name()
         update_relations()
         super(PageMixin, self).save(*args, **kwargs)
+        update_page_url()
 
 
 class SyncPageMixin(PageMixin):
@@ -0,0 +1,46 @@
+"""
+Signal receivers connected and disconnected as a group.
+
+>>> class TreeSnapshot(Receivers):
+...     def _receivers(self):
+...         return [(post_save, self.version.renew, Category)]
+...     def _dispatch_prefix(self):
+...         return 'catalog.tree'
+>>> TreeSnapshot().connect()  # at `AppConfig.ready`
+"""
+
+import abc
+import typing
+
+from django.dispatch import Signal
+
+
+class Receivers(abc.ABC):
+
+    @abc.abstractmethod
+    def _receivers(self) -> typing.List[typing.Tuple[Signal, typing.Callable, typing.Any]]:
+        """Return (signal, receiver, sender) triples. None sender means all the models."""
+
+    @abc.abstractmethod
+    def _dispatch_prefix(self) -> str:
+        """Distinguish receivers of the instance from ones of other instances."""
+
+    def _dispatch_uid(self, receiver, sender) -> str:
+        return (
+            f'{self._dispatch_prefix()}'
+            f'.{receiver.__name__}.{getattr(sender, "__name__", "all")}'
+        )
+
+    def connect(self):
+        for signal, receiver, sender in self._receivers():
+            signal.connect(
+                receiver, sender=sender, weak=False,
+                dispatch_uid=self._dispatch_uid(receiver, sender),
+            )
+
+    def disconnect(self):
+        for signal, receiver, sender in self._receivers():
+            signal.disconnect(
+                sender=sender,
+                dispatch_uid=self._dispatch_uid(receiver, sender),
+            )
@@ -0,0 +1,147 @@
+"""
+Streaming XML sitemaps of active pages.
+
+Pages are read by chunks with their stored url paths,
+so urls of backfilled pages cost no queries.
+Sitemaps are split by `MAX_URLS` urls into gzipped files, listed by the index file.
+Every file is written to a temporary one and then replaced atomically,
+so web servers serve the sitemaps as static files even during regeneration.
+
+>>> write_sitemaps('/var/www/static', 'https://example.com', iter_urls())
+['sitemap-1.xml.gz', 'sitemap-2.xml.gz', 'sitemap.xml']
+"""
+
+import gzip
+import os
+import tempfile
+import typing
+from datetime import date
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+from pages.models import Page
+
+# Urls count limit of one sitemap file by the sitemaps protocol.
+MAX_URLS = 50000
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class Url(typing.NamedTuple):
+    path: str
+    lastmod: date
+
+
+def _resolve_url(page: Page) -> str:
+    try:
+        return page.resolve_stored_url()
+    except AttributeError:
+        # broken relations of model pages. They have no urls
+        return ''
+
+
+def iter_urls(pages=None, chunk_size=2000) -> typing.Iterator[Url]:
+    """
+    Yield urls of the active pages.
+
+    Pages without stored url paths are loaded by chunks and resolved one by one,
+    so every of them costs its ancestors or related model query.
+    Run `backfill_url_paths` command to fill the paths. Not routable pages are skipped.
+    """
+    pages = Page.objects.active() if pages is None else pages
+    rows = (
+        pages
+        .order_by('id')
+        .values_list('id', 'url_path', 'date_published')
+        .iterator()
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        not_stored = [id_ for id_, url_path, _ in chunk if not url_path]
+        resolved = {
+            page.id: _resolve_url(page)
+            for page in Page.objects.filter(id__in=not_stored)
+        } if not_stored else {}
+
+        for id_, url_path, date_published in chunk:
+            path = url_path or resolved.get(id_)
+            if path:
+                yield Url(path, date_published)
+
+
+def _write_atomic(path: str, write: typing.Callable[[typing.TextIO], None], compress=False):
+    """Write the file by the temporary one in the same directory and replace it."""
+    directory, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', dir=directory)
+    os.close(fd)
+    try:
+        with (gzip.open if compress else open)(temp_path, 'wt', encoding='utf-8') as file:
+            write(file)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_urlset(file: typing.TextIO, base_url: str, urls: typing.Iterable[Url]):
+    file.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n')
+    for url in urls:
+        file.write(
+            f'<url><loc>{escape(base_url + url.path)}</loc>'
+            f'<lastmod>{url.lastmod.isoformat()}</lastmod></url>\n'
+        )
+    file.write('</urlset>\n')
+
+
+def _write_index(file: typing.TextIO, base_url: str, names: typing.List[str]):
+    today = date.today().isoformat()
+    file.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n')
+    for name in names:
+        file.write(
+            f'<sitemap><loc>{escape(f"{base_url}/{name}")}</loc>'
+            f'<lastmod>{today}</lastmod></sitemap>\n'
+        )
+    file.write('</sitemapindex>\n')
+
+
+def write_sitemaps(
+    directory: str, base_url: str, urls: typing.Iterable[Url],
+    name='sitemap', max_urls=MAX_URLS,
+) -> typing.List[str]:
+    """
+    Write gzipped sitemaps by `max_urls` urls and their index file.
+
+    Sitemaps of the previous generation beyond the new ones are removed.
+    :return: written files names. The index is the last one.
+    """
+    base_url = base_url.rstrip('/')
+    urls = iter(urls)
+    names = []
+    while True:
+        first = next(urls, None)
+        if first is None and names:
+            break
+        # the only sitemap of no urls is still written for the index
+        part = chain([first], islice(urls, max_urls - 1)) if first else []
+        names.append(f'{name}-{len(names) + 1}.xml.gz')
+        _write_atomic(
+            os.path.join(directory, names[-1]),
+            lambda file: _write_urlset(file, base_url, part),
+            compress=True,
+        )
+
+    index_name = f'{name}.xml'
+    _write_atomic(
+        os.path.join(directory, index_name),
+        lambda file: _write_index(file, base_url, names),
+    )
+
+    stale_number = len(names) + 1
+    while os.path.exists(os.path.join(directory, f'{name}-{stale_number}.xml.gz')):
+        os.remove(os.path.join(directory, f'{name}-{stale_number}.xml.gz'))
+        stale_number += 1
+
+    return names + [index_name]
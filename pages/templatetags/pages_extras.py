@@ -1,24 +1,26 @@
+import typing
+
 from django import template
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.db.models import Q
 
-from pages import logic
-from pages.models import CustomPage, FlatPage, Page
+from pages.breadcrumbs import get_breadcrumbs
+from pages.cache import get_timeout, tree_version
+from pages.models import CustomPage, Page, render_pages_fields
 
 register = template.Library()
 
 
 def _base_breadcrumbs(page: Page, separator='', *, show_siblings=False, show_last_page_siblings=False):
+    # @todo #345:60m  Refold catalog pages in DB.
+    #  In both fixtures and local DB.
+    #  Implement this pages structure:
+    #  - each(category_roots).parent == CustomPage.get('catalog')
+    #  - CustomPage.get('catalog').parent == CustomPage.get('index')
     return {
-        'breadcrumbs': [
-            # @todo #345:60m  Refold catalog pages in DB.
-            #  In both fixtures and local DB.
-            #  Implement this pages structure:
-            #  - each(category_roots).parent == CustomPage.get('catalog')
-            #  - CustomPage.get('catalog').parent == CustomPage.get('index')
-            logic.Page(model=CustomPage.objects.get(slug='')),  # index page
-            *list(logic.Page(model=page).breadcrumbs)
-        ],
+        'breadcrumbs': get_breadcrumbs(page, with_siblings=show_siblings),
         'separator': separator,
         'show_siblings': show_siblings,
         'show_last_page_siblings': show_last_page_siblings,
@@ -35,29 +37,55 @@ def breadcrumbs_with_siblings(page: Page, separator='', show_last_page_siblings=
     return _base_breadcrumbs(page, separator, show_siblings=True, show_last_page_siblings=show_last_page_siblings)
 
 
-@register.inclusion_tag('pages/accordion.html')
-def accordion(links_per_item=10, sort_field='position'):
-    """Render accordion with root pages as main items"""
-
-    # root pages list
-    sections = list(
-        filter(
-            lambda p: p.is_root,
-            FlatPage.objects.filter(type=Page.FLAT_TYPE)
-            .order_by(sort_field)
-            .filter(is_active=True)
-            .iterator()
+def _accordion_sections(links_per_item, sort_field) -> typing.List[Page]:
+    """Build accordion sections and their pages from one query over two tree levels."""
+    pages = (
+        Page.objects
+        .filter(
+            Q(level=0, type=Page.FLAT_TYPE, is_active=True)
+            | Q(level=1, parent__type=Page.FLAT_TYPE, parent__is_active=True)
         )
+        .order_by(sort_field)
     )
 
+    sections, children = [], {}
+    for page in pages:
+        if page.parent_id is None:
+            sections.append(page)
+        else:
+            children.setdefault(page.parent_id, []).append(page)
+
     for section in sections:
-        section.pages = section.children.all().order_by(sort_field)[:links_per_item]
+        section.pages = children.get(section.id, [])[:links_per_item]
+
+    return sections
+
+
+@register.inclusion_tag('pages/accordion.html')
+def accordion(links_per_item=10, sort_field='position'):
+    """Render accordion with root pages as main items"""
+    key = tree_version.key('accordion', links_per_item, sort_field)
+    sections = cache.get(key)
+    if sections is None:
+        sections = _accordion_sections(links_per_item, sort_field)
+        cache.set(key, sections, get_timeout())
 
     return {
         'sections': sections,
     }
 
 
+@register.simple_tag
+def pages_tree_version():
+    """
+    Return the pages tree version for fragments cache keys.
+
+    {% pages_tree_version as version %}
+    {% cache 3600 menu version %}...{% endcache %}
+    """
+    return tree_version.value()
+
+
 @register.simple_tag
 def custom_url(*args):
     return reverse(CustomPage.ROUTE, args=args or ('',))
@@ -68,6 +96,20 @@ def full_url(url_name, *args):
     return settings.BASE_URL + reverse(url_name, args=args)
 
 
+@register.filter
+def with_rendered_fields(pages, fields=''):
+    """
+    Render template fields of the listed pages at once. Fields are comma separated.
+
+    {% for item in page.children.all|with_rendered_fields:'title' %}
+      {{ item.display_title }}
+    {% endfor %}
+    """
+    if not fields:
+        return render_pages_fields(pages)
+    return render_pages_fields(pages, fields.split(','))
+
+
 @register.filter
 def hasattr_(obj, arg):
     return hasattr(obj, arg)
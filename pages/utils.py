@@ -1,11 +1,74 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
 from django.conf import settings
 from django.contrib.redirects.models import Site
 from django.template import engines
 
+# Compiled templates count kept by the process.
+# Override it with `PAGES_COMPILED_TEMPLATES_SIZE` setting.
+COMPILED_TEMPLATES_SIZE = 1000
+
+
+class CompiledTemplates:
+    """
+    Bounded LRU of compiled templates, shared by the process threads.
+
+    Pages render every db template field several times per request,
+    so every template source is parsed once until it's evicted.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'<CompiledTemplates size={self.size} hits={self.hits} misses={self.misses}>'
+
+    def __len__(self):
+        return len(self._templates)
+
+    @staticmethod
+    def key(source: str) -> str:
+        return hashlib.md5(source.encode()).hexdigest()
+
+    def get(self, source: str):
+        key = self.key(source)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        template = engines['django'].from_string(source)
+        with self._lock:
+            self._templates[key] = template
+            while len(self._templates) > self.size:
+                self._templates.popitem(last=False)
+        return template
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self.hits = self.misses = 0
+
+
+compiled_templates = CompiledTemplates(
+    getattr(settings, 'PAGES_COMPILED_TEMPLATES_SIZE', COMPILED_TEMPLATES_SIZE),
+)
+
 
 def render_str(template: str, context: dict):
-    django_engine = engines['django']
-    return django_engine.from_string(template).render(context)
+    return compiled_templates.get(template).render(context)
 
 
 def save_custom_pages():
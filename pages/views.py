@@ -1,8 +1,7 @@
-import math
-
 from django.conf import settings
+from django.db.models import Q
 from django.http import HttpResponse, HttpResponsePermanentRedirect, Http404
-from django.shortcuts import render, get_object_or_404, render_to_response
+from django.shortcuts import render
 from django.views.generic import DetailView, ListView, View
 from django.views.generic.detail import SingleObjectMixin
 
@@ -50,11 +49,26 @@ class FlatPageView(DetailView):
         """
         return '/'.join(slugs) in page.url
 
+    def get_page(self, slugs):
+        """
+        Find the page by its slugs with one query.
+
+        The stored url path should end with the slugs,
+        so the same row serves the full path and the redirect to it.
+        Pages without stored url paths are checked by `is_correct_path`.
+        """
+        return (
+            self.model.objects
+            .filter(slug=slugs[-1])
+            .filter(Q(url_path__endswith='/{}/'.format('/'.join(slugs))) | Q(url_path=''))
+            .first()
+        )
+
     def get(self, request, *args):
         """Get method for flat page"""
-        self.object = page = get_object_or_404(self.model, slug=args[-1])
+        self.object = page = self.get_page(args)
 
-        if not self.is_correct_path(args, page):
+        if not page or not self.is_correct_path(args, page):
             """Check URL path, if is not correct - 404"""
             raise Http404()
 
@@ -1,4 +1,4 @@
-from refarm_pagination.pagination import Paginator, NeighborPages
+from refarm_pagination.pagination import KeysetPaginator, NeighborPages, Paginator
 
 
 # @todo #255:30m  Improve `PaginationContext` interface.
@@ -8,11 +8,21 @@ from refarm_pagination.pagination import Paginator, NeighborPages
 #  See `catalog.context.products.PaginatedProducts#qs`.
 class PaginationContext:
 
-    def __init__(self, url, number, per_page, objects):
+    def __init__(
+        self, url, number, per_page, objects,
+        count: int=None, is_approximate=False,
+    ):
+        """
+        :param count: Ready objects count.
+            See `pagination.cached_count` and `counts.approximate_count`.
+        :param is_approximate: The count is approximate. Templates may render it as "~12 000".
+        """
         self.url = url
         self.number = number
         self.objects = objects
-        self.paginator = Paginator(objects, per_page)
+        self.paginator = Paginator(
+            objects, per_page, count=count, is_approximate=is_approximate,
+        )
 
     def context(self):
         page = self.paginator.page(self.number)
@@ -33,5 +43,35 @@ class PaginationContext:
             'prev_pairs': prev_pairs,
             'next_pairs': next_pairs,
             'showed_count': showed_count,
-            'total_products': self.objects.count(),
+            # the paginator has counted objects already
+            'total_products': self.paginator.count,
+            'is_total_approximate': self.paginator.is_approximate,
+        }
+
+
+class KeysetPaginationContext:
+    """
+    Context of the keyset pagination. Fits "load more" style listings.
+
+    Objects are sorted by `CATEGORY_SORTING_OPTIONS` setting option.
+    The total count is computed only with `with_count` flag.
+    """
+
+    def __init__(
+        self, url, per_page, objects,
+        sorting_index=0, after='', before='', with_count=False,
+    ):
+        self.url = url
+        self.after = after
+        self.before = before
+        self.with_count = with_count
+        self.paginator = KeysetPaginator.from_sorting(objects, per_page, sorting_index)
+
+    def context(self):
+        page = self.paginator.page(after=self.after, before=self.before)
+        return {
+            'page': page,
+            'prev_url': page.previous_url(self.url),
+            'next_url': page.next_url(self.url),
+            'total_products': self.paginator.count if self.with_count else None,
         }
@@ -0,0 +1,68 @@
+"""
+Approximate objects counts for huge listings.
+
+The exact COUNT of a big category dominates the listing latency.
+For big listings the approximate count is enough, so we take it
+from the stored counts or from the database planner.
+Small listings are counted exactly.
+
+>>> count = approximate_count(products, estimate=lambda _: category.subtree_products_count)
+>>> Paginator(products, 30, count=count.value, is_approximate=count.is_approximate)
+"""
+
+import typing
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+
+# Listings with less objects are counted exactly.
+# Override it with `PAGINATION_APPROXIMATE_COUNT_THRESHOLD` setting.
+APPROXIMATE_COUNT_THRESHOLD = 10000
+
+Estimate = typing.Callable[[QuerySet], typing.Optional[int]]
+
+
+class Count(typing.NamedTuple):
+    value: int
+    is_approximate: bool
+
+
+def get_threshold() -> int:
+    return getattr(
+        settings, 'PAGINATION_APPROXIMATE_COUNT_THRESHOLD', APPROXIMATE_COUNT_THRESHOLD,
+    )
+
+
+def planner_estimate(objects: QuerySet) -> typing.Optional[int]:
+    """
+    Return the rows estimate of PostgreSQL planner for the objects query.
+
+    The estimate is based on the tables statistics, so it costs no scans.
+    Other databases have no estimate.
+    """
+    connection = connections[objects.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    sql, params = objects.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def approximate_count(
+    objects: QuerySet, estimate: Estimate=planner_estimate, threshold: int=None,
+) -> Count:
+    """
+    Return the estimated count for big listings and the exact one for others.
+
+    :param estimate: Returns approximate objects count or None if it's unknown.
+    :param threshold: Listings with less estimated objects are counted exactly.
+    """
+    threshold = get_threshold() if threshold is None else threshold
+    estimated = estimate(objects)
+    if estimated is None or estimated < threshold:
+        return Count(objects.count(), is_approximate=False)
+    return Count(estimated, is_approximate=True)
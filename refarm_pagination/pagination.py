@@ -1,13 +1,105 @@
+import json
+import typing
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+
 from django import http
 from django.conf import settings
 from django.core import paginator
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def cached_count(objects: QuerySet, key: str, timeout=DEFAULT_TIMEOUT) -> int:
+    """
+    Count objects once per the cache timeout.
+
+    Pass the result to `Paginator` to skip the COUNT query of the listing.
+    The key should identify the objects set. For example category id and tags.
+    """
+    return cache.get_or_set(key, objects.count, timeout)
+
+
+class ApproximatePage(paginator.Page):
+    """
+    Page of the approximately counted objects.
+
+    The count can't tell if the next page exists,
+    so the page knows it from the one more fetched object.
+    """
+
+    def __init__(self, object_list, number, paginator_, has_next: bool):
+        super().__init__(object_list, number, paginator_)
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def next_page_number(self) -> int:
+        if not self._has_next:
+            raise paginator.EmptyPage('That page contains no results')
+        return self.number + 1
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self) - 1
 
 
 class Paginator(paginator.Paginator):
 
+    def __init__(
+        self, object_list, per_page, *args,
+        count: int=None, is_approximate=False, **kwargs
+    ):
+        """
+        :param count: Ready objects count. For example, cached one.
+            Paginator counts objects itself, if it's not given.
+        :param is_approximate: The given count is approximate.
+            See `refarm_pagination.counts` module.
+        """
+        assert count is not None or not is_approximate, 'approximate count is required'
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self._count = count
+        self.is_approximate = is_approximate
+
+    @cached_property
+    def count(self) -> int:
+        """The total objects count. It's computed only once."""
+        return self._count if self._count is not None else super().count
+
+    def _approximate_page(self, number) -> paginator.Page:
+        """
+        Return the page without validation by the count.
+
+        Real objects count may be more or less then the approximate one.
+        So only empty pages are wrong.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise paginator.PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise paginator.EmptyPage('That page number is less than 1')
+
+        bottom = (number - 1) * self.per_page
+        # take one more object to know if there is one more page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise paginator.EmptyPage('That page contains no results')
+        return ApproximatePage(
+            object_list[:self.per_page], number, self,
+            has_next=len(object_list) > self.per_page,
+        )
+
     def page(self, number) -> paginator.Page:
         """Raise Http404 instead of InvalidPage."""
         try:
+            if self.is_approximate:
+                return self._approximate_page(number)
             return super().page(number)
         except paginator.InvalidPage:
             raise http.Http404('Page does not exist')
@@ -32,7 +124,12 @@ class NeighborPages:
 
         self._index = page.number - 1
         self._neighbor_bounds = settings.PAGINATION_NEIGHBORS // 2
-        self._neighbor_range = list(self.page.paginator.page_range)
+        # approximate count doesn't bound pages, so only the known ones are linked
+        self._neighbor_range = list(
+            range(1, page.number + 1 + page.has_next())
+            if self._is_approximate
+            else self.page.paginator.page_range
+        )
 
     def __repr__(self):
         return (
@@ -43,10 +140,15 @@ class NeighborPages:
             '>'
         )
 
+    @property
+    def _is_approximate(self) -> bool:
+        return isinstance(self.page, ApproximatePage)
+
     def _neighbors(self, numbers):
         neighbors = []
         for number in numbers:
-            self.page.paginator.validate_number(number)
+            if not self._is_approximate:
+                self.page.paginator.validate_number(number)
             neighbors.append(NeighborPage(number))
         return neighbors
 
@@ -57,3 +159,126 @@ class NeighborPages:
     def next_neighbors(self):
         numbers = self._neighbor_range[self._index + 1:][:self._neighbor_bounds]
         return self._neighbors(numbers)
+
+
+class KeysetPage:
+    """Page of the keyset pagination. It has cursors instead of the number."""
+
+    def __init__(
+        self, object_list: list, paginator: 'KeysetPaginator',
+        has_next: bool, has_previous: bool,
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage objects={len(self)} next={self.has_next()} prev={self.has_previous()}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_cursor(self) -> str:
+        return self.paginator.cursor(self.object_list[-1]) if self.has_next() else ''
+
+    def previous_cursor(self) -> str:
+        return self.paginator.cursor(self.object_list[0]) if self.has_previous() else ''
+
+    def next_url(self, base_url) -> str:
+        return f'{base_url}?after={self.next_cursor()}' if self.has_next() else ''
+
+    def previous_url(self, base_url) -> str:
+        return f'{base_url}?before={self.previous_cursor()}' if self.has_previous() else ''
+
+
+class KeysetPaginator:
+    """
+    Paginate objects by (sort field, id) cursors instead of offsets.
+
+    The page query costs the same for the first and the last pages
+    and doesn't need the total count.
+    Sort field should be not nullable.
+
+    >>> paginator = KeysetPaginator(products, per_page=30, field='price')
+    >>> page = paginator.page(after=request.GET.get('after'))
+    >>> page.next_url(request.path)
+    """
+
+    def __init__(self, objects: QuerySet, per_page: int, field: str, direction=''):
+        assert direction in ['', '-'], 'direction should be "" or "-"'
+        self.objects = objects
+        self.per_page = per_page
+        self.field = field
+        self.direction = direction
+
+    @classmethod
+    def from_sorting(cls, objects: QuerySet, per_page: int, sorting_index=0):
+        """Take sort field and direction from `CATEGORY_SORTING_OPTIONS` setting."""
+        options = settings.CATEGORY_SORTING_OPTIONS[sorting_index]
+        return cls(objects, per_page, options['field'], options['direction'])
+
+    @cached_property
+    def count(self) -> int:
+        """Optional total count. Only templates those need it pay for the query."""
+        return self.objects.count()
+
+    def cursor(self, obj) -> str:
+        value = reduce(getattr, self.field.split('__'), obj)
+        raw = json.dumps([value, obj.pk], cls=DjangoJSONEncoder)
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    @cached_property
+    def sort_field(self) -> models.Field:
+        """Model field of the sort field path. It may span relations, like `page__name`."""
+        model, field = self.objects.model, None
+        for name in self.field.split('__'):
+            field = model._meta.get_field(name)
+            model = field.related_model
+        return field
+
+    def _parse_cursor(self, cursor: str) -> typing.Tuple[typing.Any, int]:
+        """Parse the cursor. Tampered ones raise 404, instead of failing the query."""
+        try:
+            value, pk = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            if isinstance(value, (list, dict)):
+                raise TypeError('Cursor value should be scalar')
+            return self.sort_field.to_python(value), int(pk)
+        except (ValueError, TypeError, ValidationError):
+            raise http.Http404('Page does not exist')
+
+    def _seek(self, cursor: str, forward: bool) -> QuerySet:
+        value, pk = self._parse_cursor(cursor)
+        lookup = 'gt' if forward == (self.direction == '') else 'lt'
+        return self.objects.filter(
+            models.Q(**{f'{self.field}__{lookup}': value})
+            | models.Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+
+    def _ordered(self, objects: QuerySet, forward: bool) -> QuerySet:
+        direction = self.direction if forward else ('' if self.direction else '-')
+        return objects.order_by(f'{direction}{self.field}', f'{direction}pk')
+
+    def page(self, after: str=None, before: str=None) -> KeysetPage:
+        """Return the page following `after` cursor or preceding `before` one."""
+        assert not (after and before), 'pass only one of `after` and `before` cursors'
+        forward = not before
+        cursor = after or before
+        objects = self._seek(cursor, forward) if cursor else self.objects
+        # take one more object to know if there is one more page
+        object_list = list(self._ordered(objects, forward)[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if forward:
+            return KeysetPage(object_list, self, has_next=has_more, has_previous=bool(cursor))
+        return KeysetPage(object_list[::-1], self, has_next=True, has_previous=has_more)
@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 
 class RedirectsConfig(AppConfig):
     name = 'refarm_redirects'
     verbose_name = _('refarm_redirects')
+
+    def ready(self):
+        from django.contrib.redirects.models import Redirect
+        from refarm_redirects.redirects import invalidate_tables
+
+        post_save.connect(invalidate_tables, sender=Redirect)
+        post_delete.connect(invalidate_tables, sender=Redirect)
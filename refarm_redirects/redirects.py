@@ -0,0 +1,81 @@
+import typing
+from uuid import uuid4
+
+from django.contrib.redirects.models import Redirect
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_CACHE_KEY = 'refarm_redirects:version'
+
+
+class Table:
+    """
+    In-memory `old_path -> new_path` map for one site.
+
+    The table costs one query at loading time.
+    All the lookups after it are dict access.
+    """
+
+    def __init__(self, site_id: int):
+        self.site_id = site_id
+        self._paths = dict(
+            Redirect.objects
+            .filter(site_id=site_id)
+            .values_list('old_path', 'new_path')
+        )
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __repr__(self):
+        return f'<redirects.Table site={self.site_id} size={len(self)}>'
+
+    def get(self, path: str) -> typing.Optional[str]:
+        """Return the new path or `None`. Empty new path means "gone"."""
+        return self._paths.get(path)
+
+
+class Tables:
+    """
+    Process-wide storage of redirect tables.
+
+    Every process keeps its own tables,
+    but all the processes share the tables version through the django cache.
+    Redirects saving or deleting renews the version
+    and every process reloads its tables lazily at the next lookup.
+    Evicted version key leads to a new version too.
+    Bulk updates skip model signals, so call `invalidate_tables` after them.
+    """
+
+    def __init__(self):
+        self._tables: typing.Dict[int, Table] = {}
+        self._version = None
+
+    def version(self) -> str:
+        return cache.get_or_set(VERSION_CACHE_KEY, lambda: uuid4().hex, timeout=None)
+
+    def invalidate(self):
+        cache.set(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        self._tables = {}
+
+    def get(self, site_id: int) -> Table:
+        version = self.version()
+        if version != self._version:
+            self._tables = {}
+            self._version = version
+        if site_id not in self._tables:
+            self._tables[site_id] = Table(site_id)
+        return self._tables[site_id]
+
+
+tables = Tables()
+
+
+def invalidate_tables(*args, **kwargs):
+    """
+    Signal receiver for Redirect model's changes.
+
+    Other processes should not reload the tables from not committed data
+    under the new version, so the version is renewed after the commit.
+    """
+    transaction.on_commit(tables.invalidate)
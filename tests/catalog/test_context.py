@@ -5,10 +5,14 @@
 
 import unittest
 
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.http import Http404
 from django.test import TestCase, override_settings
 
 from catalog import context as context
+from pages import memo
+from pages.models import Page, PageTemplate
 from tests.catalog import models as catalog_models
 
 
@@ -46,6 +50,22 @@ class ProductsContext(TestCase):
                 # page number doesn't exist
                 context.products.PaginatedProducts(None, '', page_number - 1, self.PER_PAGE)
 
+    def test_paginated_memo(self):
+        """Pagination context should be computed once per the memo scope."""
+        memo.stats.reset()
+        name = 'PaginatedProducts._pagination_context'
+        with override_settings(CATEGORY_STEP_MULTIPLIERS=[self.PER_PAGE]):
+            with memo.scope():
+                paginated = context.products.PaginatedProducts(
+                    catalog_models.MockProduct.objects.all(), '', 1, self.PER_PAGE,
+                )
+                paginated.products, paginated.context()
+            self.assertEqual({'hits': 2, 'misses': 1}, memo.stats.as_dict()[name])
+
+            # the scope is closed, so values are freed
+            paginated.products
+            self.assertEqual({'hits': 2, 'misses': 1}, memo.stats.as_dict()[name])
+
 
 class TagsContext(TestCase):
 
@@ -64,3 +84,169 @@ class TagsContext(TestCase):
     def test_404_check_tags(self):
         with self.assertRaises(Http404):
             context.tags.Checked404Tags(mocked_ctx(qs_attrs={'exists.return_value': False})).qs()
+
+    def test_checked_tags_memo(self):
+        """Tags should be checked once per the memo scope."""
+        tags_ctx = mocked_ctx(qs_attrs={'exists.return_value': True})
+        checked = context.tags.Checked404Tags(tags_ctx)
+        with memo.scope():
+            self.assertIs(checked.qs(), checked.qs())
+        tags_ctx.qs().exists.assert_called_once_with()
+
+    def test_renew_counts_on_tags_changes(self):
+        receivers = context.tags.CountsReceivers(
+            catalog_models.MockProduct, catalog_models.MockTag,
+        )
+        receivers.connect()
+        self.addCleanup(receivers.disconnect)
+        category = catalog_models.MockCategory.objects.create(name='Category')
+        product = catalog_models.MockProduct.objects.create(name='Product', category=category)
+        group = catalog_models.MockTagGroup.objects.create(name='Color')
+        tag = catalog_models.MockTag.objects.create(name='Red', group=group)
+
+        key = context.tags.counts_cache_key(category)
+        product.tags.add(tag)
+        self.assertNotEqual(key, context.tags.counts_cache_key(category))
+
+        key = context.tags.counts_cache_key(category)
+        product.page.is_active = False
+        product.page.save()
+        self.assertNotEqual(key, context.tags.counts_cache_key(category))
+
+    def test_grouped_tags_cached_counts(self):
+        cache.clear()
+        tags = mocked_ctx(qs_attrs={'count_products.return_value': {1: 2}})
+        products = catalog_models.MockProduct.objects.none()
+
+        for _ in range(2):
+            context.tags.GroupedTags(tags, products, cache_key='counts').context()
+
+        tags.qs().count_products.assert_called_once_with(products)
+        tags.qs().group_tags.assert_called_with(counts={1: 2})
+
+
+class BrandsContext(TestCase):
+
+    def test_cached_brands(self):
+        cache.clear()
+        brand = catalog_models.MockTag(id=1, name='Duracell')
+        tags = unittest.mock.Mock(**{
+            'get_brands_by_product_ids.return_value': {1: brand},
+        })
+
+        for _ in range(2):
+            self.assertEqual(
+                {1: brand},
+                context.products.CachedBrands(tags).get([1, 2]),
+            )
+        tags.get_brands_by_product_ids.assert_called_once_with([1, 2])
+
+        context.products.invalidate_brands([2])
+        context.products.CachedBrands(tags).get([1, 2])
+        tags.get_brands_by_product_ids.assert_called_with([2])
+
+    def test_read_brands_version_once(self):
+        tags = unittest.mock.Mock(**{'get_brands_by_product_ids.return_value': {}})
+        with unittest.mock.patch.object(
+            context.products.CachedBrands.VERSION, 'value', return_value='1',
+        ) as value:
+            context.products.CachedBrands(tags).get([1, 2, 3])
+            value.assert_called_once_with()
+            context.products.invalidate_brands([1, 2, 3])
+            self.assertEqual(2, value.call_count)
+
+    def test_invalidate_cleared_tag_brands(self):
+        cache.clear()
+        tags = unittest.mock.Mock(**{'get_brands_by_product_ids.return_value': {}})
+        context.products.CachedBrands(tags).get([1, 2])
+
+        # the cleared tag's products are unknown, so all the brands are dropped
+        context.products.invalidate_brands_receiver(
+            instance=None, action='post_clear', reverse=True, pk_set=None,
+        )
+        context.products.CachedBrands(tags).get([1, 2])
+        tags.get_brands_by_product_ids.assert_called_with([1, 2])
+
+    def test_invalidate_on_tag_edit(self):
+        cache.clear()
+        group = catalog_models.MockTagGroup.objects.create(name='Brand')
+        tag = catalog_models.MockTag.objects.create(name='Duracell', group=group)
+        tags = unittest.mock.Mock(**{'get_brands_by_product_ids.return_value': {1: tag}})
+        context.products.connect_brands_receivers(
+            catalog_models.MockProduct, catalog_models.MockTag,
+        )
+        self.addCleanup(
+            post_save.disconnect, sender=catalog_models.MockTag,
+            dispatch_uid='catalog.brands.MockTag.saved',
+        )
+        self.addCleanup(
+            post_delete.disconnect, sender=catalog_models.MockTag,
+            dispatch_uid='catalog.brands.MockTag.deleted',
+        )
+        self.addCleanup(
+            m2m_changed.disconnect, sender=catalog_models.MockProduct.tags.through,
+            dispatch_uid='catalog.brands.MockProduct.tags_changed',
+        )
+        context.products.CachedBrands(tags).get([1])
+
+        tag.name = 'Energizer'
+        tag.save()
+        context.products.CachedBrands(tags).get([1])
+        self.assertEqual(2, tags.get_brands_by_product_ids.call_count)
+
+
+class PageContext(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        group = catalog_models.MockTagGroup.objects.create(name='Color')
+        self.tag = catalog_models.MockTag.objects.create(name='Red', group=group)
+        template = PageTemplate.objects.create(
+            name='Tagged', title='{{ page.name }} {{ tag_titles }}', h1='{{ page.name }}',
+        )
+        self.page = Page.objects.create(name='Lamps', template=template)
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def display(self):
+        page = Page.objects.get(id=self.page.id)
+        tags = context.base.Tags(catalog_models.MockTag.objects.filter(id=self.tag.id))
+        context.base.Page(page, tags).context()
+        return page.display
+
+    def test_cached_display_fields(self):
+        self.assertEqual('Lamps Red', self.display().title)
+        page = Page.objects.get(id=self.page.id)
+        tags = context.base.Tags(catalog_models.MockTag.objects.filter(id=self.tag.id))
+        # only the tags query for the cache key
+        with self.assertNumQueries(1):
+            context.base.Page(page, tags).context()
+            self.assertEqual('Lamps Red', page.display.title)
+            self.assertEqual('Lamps', page.display.h1)
+
+    def test_renew_on_tag_edit(self):
+        self.display().title
+        self.tag.name = 'Blue'
+        self.tag.save()
+        self.assertEqual('Lamps Blue', self.display().title)
+
+    def test_keep_on_page_save_without_changes(self):
+        self.display().title
+        Page.objects.get(id=self.page.id).save()
+        # the page and the tags queries only
+        with self.assertNumQueries(2):
+            self.display().title
+
+    def test_renew_on_page_edit(self):
+        self.display().title
+        self.page.name = 'Lights'
+        self.page.save()
+        self.assertEqual('Lights Red', self.display().title)
+
+    def test_renew_on_template_edit(self):
+        self.display().title
+        self.page.template.title = '{{ tag_titles }}'
+        self.page.template.save()
+        self.assertEqual('Red', self.display().title)
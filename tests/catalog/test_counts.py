@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from catalog.counts import ProductsCounts
+from tests.catalog import models as catalog_models
+
+
+class ProductsCountsTest(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def setUp(self):
+        # root -> child, other root
+        self.root = catalog_models.MockCategory.objects.get()
+        self.child = catalog_models.MockCategory.objects.create(name='Child', parent=self.root)
+        self.other = catalog_models.MockCategory.objects.create(name='Other')
+        products = catalog_models.MockProduct.objects.active()
+        products.filter(
+            id__in=products.values_list('id', flat=True)[:3],
+        ).update(category=self.child)
+
+        self.counts = ProductsCounts(catalog_models.MockCategory, catalog_models.MockProduct)
+        self.counts.connect()
+        call_command(
+            'recount_category_products', 'tests.MockCategory', 'tests.MockProduct',
+            stdout=StringIO(),
+        )
+
+    def tearDown(self):
+        self.counts.disconnect()
+        super().tearDown()
+
+    def assert_counts(self):
+        products = catalog_models.MockProduct.objects.active()
+        for category in catalog_models.MockCategory.objects.all():
+            self.assertEqual(
+                (
+                    products.filter(category=category).count(),
+                    products.filter_descendants(category).count(),
+                ),
+                (category.products_count, category.subtree_products_count),
+                msg=category,
+            )
+
+    def product(self):
+        return (
+            catalog_models.MockProduct.objects
+            .active()
+            .filter(category=self.child)
+            .select_related('page')
+            .first()
+        )
+
+    def test_drifted_counts_are_not_negative(self):
+        """Drifted zero counts don't break product saves."""
+        catalog_models.MockCategory.objects.update(products_count=0, subtree_products_count=0)
+        product = self.product()
+        product.page.is_active = False
+        product.page.save()
+        self.assertEqual(
+            [(0, 0)] * 3,
+            list(catalog_models.MockCategory.objects.values_list(
+                'products_count', 'subtree_products_count',
+            )),
+        )
+
+    def test_recount(self):
+        self.assertEqual(
+            [self.root, self.child],
+            list(catalog_models.MockCategory.objects.with_products().order_by('id')),
+        )
+        self.assert_counts()
+
+    def test_page_activity(self):
+        page = self.product().page
+        page.is_active = False
+        page.save()
+        self.assert_counts()
+
+        page.is_active = True
+        page.save()
+        self.assert_counts()
+
+    def test_product_category(self):
+        product = self.product()
+        product.category = self.other
+        product.save()
+        self.assert_counts()
+
+    def test_product_create_delete(self):
+        product = catalog_models.MockProduct.objects.create(
+            name='New product', category=self.product().category,
+        )
+        self.assert_counts()
+
+        product.delete()
+        self.assert_counts()
+
+    def test_category_move(self):
+        self.child.parent = self.other
+        self.child.save()
+        self.assert_counts()
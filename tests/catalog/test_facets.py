@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from catalog.facets import FacetIndex, Facets
+from tests.catalog import models as catalog_models
+
+
+class Index(TestCase):
+
+    def setUp(self):
+        # products: 1, 2, 3
+        # tags by groups: 10 -> {1, 2}, 11 -> {3}, 20 -> {1, 3}
+        self.index = FacetIndex(category_id=1, rows=[
+            (1, 10, 1), (1, 20, 2),
+            (2, 10, 1),
+            (3, 11, 1), (3, 20, 2),
+        ])
+
+    def test_or_within_group(self):
+        matched = self.index.match([(10, 1), (11, 1)])
+        self.assertEqual([1, 2, 3], self.index.product_ids(matched))
+
+    def test_and_across_groups(self):
+        matched = self.index.match([(10, 1), (20, 2)])
+        self.assertEqual([1], self.index.product_ids(matched))
+
+    def test_no_tags_match_all(self):
+        self.assertEqual([1, 2, 3], self.index.product_ids(self.index.match([])))
+
+    def test_reachable(self):
+        matched = self.index.match([(11, 1)])
+        self.assertEqual({11, 20}, self.index.reachable(matched))
+
+    def test_remove_and_add_product(self):
+        self.index.remove_product(1)
+        self.assertNotIn(1, self.index)
+        self.assertEqual([], self.index.product_ids(self.index.match([(10, 1), (20, 2)])))
+
+        self.index.add_product(1, [(20, 2)])
+        self.assertIn(1, self.index)
+        self.assertEqual([1, 3], self.index.product_ids(self.index.match([(20, 2)])))
+        self.assertEqual([2], self.index.product_ids(self.index.match([(10, 1)])))
+
+
+class Engine(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def setUp(self):
+        cache.clear()
+        self.facets = Facets(catalog_models.MockProduct, catalog_models.MockTag)
+        self.facets.connect()
+        self.category = catalog_models.MockCategory.objects.first()
+
+        groups = [
+            catalog_models.MockTagGroup.objects.create(name=name)
+            for name in ['Length', 'Width']
+        ]
+        self.short, self.long = [
+            catalog_models.MockTag.objects.create(name=name, group=groups[0])
+            for name in ['1 m', '2 m']
+        ]
+        self.wide = catalog_models.MockTag.objects.create(name='3 m', group=groups[1])
+        self.first, self.second, self.third = catalog_models.MockProduct.objects.active()[:3]
+        self.first.tags.add(self.short, self.wide)
+        self.second.tags.add(self.long)
+        self.third.tags.add(self.long, self.wide)
+
+    def tearDown(self):
+        self.facets.disconnect()
+        cache.clear()
+        super().tearDown()
+
+    def assert_same_as_sql(self, tags):
+        self.assertEqual(
+            set(
+                catalog_models.MockProduct.objects
+                .active()
+                .filter_descendants(self.category)
+                .tagged_or_all(tags)
+            ),
+            set(self.facets.products(self.category, tags)),
+        )
+
+    def test_products(self):
+        tags = catalog_models.MockTag.objects.filter(id__in=[self.short.id, self.long.id])
+        self.assert_same_as_sql(tags)
+        tags = catalog_models.MockTag.objects.filter(id__in=[self.long.id, self.wide.id])
+        self.assert_same_as_sql(tags)
+
+    def test_reachable_tags(self):
+        tags = catalog_models.MockTag.objects.filter(id=self.short.id)
+        self.assertEqual(
+            {self.short, self.wide},
+            set(self.facets.tags(self.category, tags)),
+        )
+
+    def test_index_is_cached(self):
+        self.facets.index(self.category)
+        with self.assertNumQueries(0):
+            self.facets.index(self.category)
+
+    def test_tags_change_updates_index(self):
+        tags = catalog_models.MockTag.objects.filter(id=self.short.id)
+        self.facets.index(self.category)  # warm up the index
+
+        self.second.tags.add(self.short)
+        self.assertIn(self.second, self.facets.products(self.category, tags))
+
+        self.second.tags.remove(self.short)
+        self.assertNotIn(self.second, self.facets.products(self.category, tags))
+
+    def test_page_activity_updates_index(self):
+        self.facets.index(self.category)  # warm up the index
+
+        self.first.page.is_active = False
+        self.first.page.save()
+        self.assertNotIn(self.first.id, self.facets.index(self.category))
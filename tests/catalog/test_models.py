@@ -3,7 +3,7 @@ import string
 import unittest
 
 from django.db import DataError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 import catalog
 from pages.models import CustomPage
@@ -241,6 +241,27 @@ class Product(TestCase):
         for products_by_instance in products_by_instance:
             self.assertEqual(products_by_instance.category, self.category)
 
+    def test_filter_nested_descendants(self):
+        """Products of descendants are filtered by the tree range only."""
+        child = catalog_models.MockCategory.objects.create(name='Child', parent=self.category)
+        grandchild = catalog_models.MockCategory.objects.create(name='Grandchild', parent=child)
+        other = catalog_models.MockCategory.objects.create(name='Other')
+        products = {
+            category: catalog_models.MockProduct.objects.create(
+                name=category.name, category=category,
+            )
+            for category in [child, grandchild, other]
+        }
+
+        self.assertEqual(
+            {products[child], products[grandchild]},
+            set(catalog_models.MockProduct.objects.filter_descendants(child)),
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                4, catalog_models.MockProduct.objects.filter_descendants(self.category).count(),
+            )
+
     def test_tagged_disjunction(self):
         # waiting #166 for tags fixtures creating
         groups = ['Length', 'Width']
@@ -357,6 +378,85 @@ class Tag(TestCase):
             list(grouped.values()),
         )
 
+    def test_long_group_name_slug(self):
+        """Cut slug of the tag group should be the same for the same name."""
+        name = 'Максимальная рабочая температура'
+        groups = [
+            catalog_models.MockTagGroup.objects.create(name=name)
+            for _ in range(2)
+        ]
+        self.assertEqual(groups[0].slug, groups[1].slug)
+        self.assertLessEqual(len(groups[0].slug), catalog.models.TagGroup.SLUG_MAX_LENGTH)
+        self.assertEqual(
+            groups[0].slug,
+            catalog_models.MockTagGroup.objects.get(id=groups[0].id).slug,
+        )
+
+    @override_settings(TAGS_URL_DELIMITER='-or-', TAG_GROUPS_URL_DELIMITER='-and-')
+    def test_serialize_tags_to_url(self):
+        groups = [
+            catalog_models.MockTagGroup.objects.create(name=name, position=i)
+            for i, name in enumerate(['Length', 'Width'])
+        ]
+        for group in groups:
+            for name in ['1 m', '2 m']:
+                catalog_models.MockTag.objects.create(name=name, group=group)
+
+        with self.assertNumQueries(1):
+            url = catalog_models.MockTag.objects.all().serialize_tags_to_url()
+        self.assertEqual(
+            'length__1-m-or-length__2-m-and-width__1-m-or-width__2-m',
+            url,
+        )
+
+    def test_group_tags_counts(self):
+        group = catalog_models.MockTagGroup.objects.create(name='Length')
+        tags = [
+            catalog_models.MockTag.objects.create(name=name, group=group)
+            for name in ['1 m', '2 m', '3 m']
+        ]
+        category = catalog_models.MockCategory.objects.create(name='Cables')
+        products = [
+            catalog_models.MockProduct.objects.create(name=name, category=category)
+            for name in ['Short cable', 'Long cable']
+        ]
+        for product in products:
+            product.tags.add(tags[0])
+        products[1].tags.add(tags[1])
+
+        with self.assertNumQueries(1):
+            counts = catalog_models.MockTag.objects.count_products(
+                catalog_models.MockProduct.objects.filter(category=category)
+            )
+        self.assertEqual({tags[0].id: 2, tags[1].id: 1}, counts)
+
+        grouped = catalog_models.MockTag.objects.group_tags(
+            catalog_models.MockProduct.objects.filter(category=category)
+        )
+        self.assertEqual(
+            [2, 1, 0],
+            [tag.products_count for tag in grouped[group]],
+        )
+
+    @override_settings(BRAND_TAG_GROUP_NAME='Brand')
+    def test_get_brands(self):
+        brand_group = catalog_models.MockTagGroup.objects.create(name='Brand')
+        other_group = catalog_models.MockTagGroup.objects.create(name='Length')
+        brand = catalog_models.MockTag.objects.create(name='Duracell', group=brand_group)
+        length = catalog_models.MockTag.objects.create(name='1 m', group=other_group)
+        category = catalog_models.MockCategory.objects.create(name='Batteries')
+        branded, unbranded = [
+            catalog_models.MockProduct.objects.create(name=name, category=category)
+            for name in ['Branded', 'Unbranded']
+        ]
+        branded.tags.add(brand, length)
+        unbranded.tags.add(length)
+
+        with self.assertNumQueries(2):
+            brands = catalog_models.MockTag.objects.get_brands([branded, unbranded])
+        self.assertEqual({branded: brand}, brands)
+        self.assertEqual(brand_group, brands[branded].group)
+
 
 class TagsOrdering(TestCase):
 
@@ -395,3 +495,17 @@ class TagsOrdering(TestCase):
                 f'Тест{punct}{alpha}'
                 for punct, alpha in zip('-,_:;', string.ascii_lowercase[:6])
         ])
+
+    def test_fill_sort_keys(self):
+        names = ['a', '1 A', '2.1 A', 'b', '1.2 В']
+        catalog_models.MockTag.objects.bulk_create(
+            [catalog_models.MockTag(name=name) for name in names[::-1]]
+        )
+        catalog_models.MockTag.objects.update(sort_name='', sort_value=0)
+
+        with self.assertNumQueries(3):  # select, update and select of the empty batch
+            catalog.models.fill_tags_sort_keys(catalog_models.MockTag.objects.all())
+        self.assertEqual(
+            names,
+            [tag.name for tag in catalog_models.MockTag.objects.order_by_alphanumeric()],
+        )
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+
+from catalog.counts import ProductsCounts
+from catalog.tree import TreeSnapshot
+from pages.models import CustomPage
+from tests.catalog import models as catalog_models
+from tests.catalog.views import TestCategoryTree
+
+
+class Snapshot(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # root -> child -> grandchild, inactive root -> its child
+        self.root = catalog_models.MockCategory.objects.create(name='Root')
+        self.child = catalog_models.MockCategory.objects.create(name='Child', parent=self.root)
+        self.grandchild = catalog_models.MockCategory.objects.create(
+            name='Grandchild', parent=self.child,
+        )
+        self.inactive = catalog_models.MockCategory.objects.create(name='Inactive')
+        self.inactive.page.is_active = False
+        self.inactive.page.save()
+        catalog_models.MockCategory.objects.create(name='Hidden', parent=self.inactive)
+
+        self.tree = TreeSnapshot(catalog_models.MockCategory)
+        self.tree.connect()
+
+    def tearDown(self):
+        self.tree.disconnect()
+        cache.clear()
+        super().tearDown()
+
+    def test_build_with_one_query(self):
+        with self.assertNumQueries(1):
+            nodes = self.tree.nodes()
+        self.assertEqual(5, len(nodes))
+        self.assertEqual(self.child.get_absolute_url(), nodes[1].url)
+
+        with self.assertNumQueries(0):
+            self.tree.nodes()
+
+    def test_nested_active(self):
+        self.assertEqual(
+            [(self.root.id, [(self.child.id, [(self.grandchild.id, [])])])],
+            [
+                (root.id, [
+                    (child.id, [(node.id, nested) for node, nested in grandchildren])
+                    for child, grandchildren in children
+                ])
+                for root, children in self.tree.nested(active=True)
+            ],
+        )
+
+    def test_hide_empty(self):
+        catalog_models.MockCategory.objects.filter(id=self.child.id).update(
+            subtree_products_count=1,
+        )
+        catalog_models.MockCategory.objects.filter(id=self.root.id).update(
+            subtree_products_count=1,
+        )
+        self.tree.version.renew()
+        self.assertEqual(
+            [self.root.id, self.child.id],
+            [
+                node.id
+                for nodes in self.tree.children_map(hide_empty=True).values()
+                for node in nodes
+            ],
+        )
+
+    def test_renew_on_edits(self):
+        self.tree.nodes()
+        self.grandchild.page.name = 'New name'
+        self.grandchild.page.save()
+        self.assertEqual('New name', self.tree.children(self.child.id)[0].menu_title)
+
+        self.grandchild.delete()
+        self.assertEqual([], self.tree.children(self.child.id))
+
+    def test_renew_on_counts_updates(self):
+        self.tree.nodes()
+        ProductsCounts(catalog_models.MockCategory, catalog_models.MockProduct).add(
+            self.grandchild.id, 2,
+        )
+        self.assertEqual(2, self.tree.roots()[0].subtree_products_count)
+
+    def test_view(self):
+        CustomPage.objects.get_or_create(name='Index', slug='')
+        CustomPage.objects.get_or_create(slug='catalog')
+        with mock.patch.object(TestCategoryTree, 'tree', self.tree):
+            response = self.client.get(reverse('custom_page', args=('catalog',)))
+        self.assertContains(response, self.grandchild.get_absolute_url())
+        self.assertNotContains(response, self.inactive.get_absolute_url())
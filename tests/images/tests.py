@@ -1,12 +1,21 @@
+import hashlib
 import os.path
 import string
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
+from django.apps import apps
 from django.core.files.images import ImageFile
+from django.core.management import call_command
 from django.db import models
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.models import KVStore
 
 from pages.models import CustomPage
-from images.models import Image
+from images.models import Image, file_hash, prefetch_main_images
+from images.thumbnails import write_kvstore
 
 from tests import images
 
@@ -96,6 +105,119 @@ class TestImage(TestCase):
         self.assertEquals(another_image_model.image, self.page.main_image)
         another_image_model.delete()
 
+    def test_main_images_by_pages(self):
+        another_page = CustomPage.objects.create(h1='Page without images', slug='another')
+        with self.assertNumQueries(1):
+            images = Image.objects.get_main_images_by_pages([self.page, another_page])
+        self.assertEqual({self.page: self.image_model}, images)
+
+    def test_prefetch_main_images(self):
+        page = CustomPage.objects.get(id=self.page.id)
+        prefetch_main_images([page])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.image_model.image, page.main_image)
+
+    def test_main_image_pointer(self):
+        """Page's main image should cost no queries with selected related pointer."""
+        page = CustomPage.objects.select_related('main_image_record').get(id=self.page.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.image_model.image, page.main_image)
+
+    def test_main_image_pointer_on_delete(self):
+        another_image_model = create_image_model(self.page, self.IMG_PATH, 'one-another')
+        another_image_model.is_main = True
+        another_image_model.save()
+        self.assertEqual(
+            another_image_model,
+            CustomPage.objects.get(id=self.page.id).main_image_record,
+        )
+
+        another_image_model.delete()
+        self.assertIsNone(CustomPage.objects.get(id=self.page.id).main_image)
+
+    def test_backfill_main_images(self):
+        CustomPage.objects.filter(id=self.page.id).update(main_image_record=None)
+        call_command('backfill_main_images', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            self.image_model,
+            CustomPage.objects.get(id=self.page.id).main_image_record,
+        )
+
+    def test_fill_main_images_migration(self):
+        migration = import_module('pages.migrations.0021_fill_page_main_image_record')
+        CustomPage.objects.filter(id=self.page.id).update(main_image_record=None)
+        migration.fill_main_image_record(apps, None)
+        self.assertEqual(
+            self.image_model,
+            CustomPage.objects.get(id=self.page.id).main_image_record,
+        )
+
+    def test_file_hash_rewinds(self):
+        with open(self.IMG_PATH, mode='rb') as file:
+            content = file.read()
+            self.assertEqual(hashlib.md5(content).hexdigest(), file_hash(file))
+            self.assertEqual(content, file.read())
+
+    @override_settings(IMAGES_DEDUPE=True)
+    def test_dedupe_same_content(self):
+        """Images with the same content should share the stored file."""
+        another_image_model = create_image_model(self.page, self.IMG_PATH, 'one-another')
+        self.assertEqual(self.image_model.image.name, another_image_model.image.name)
+
+        # the file is still used by the first image
+        another_image_model.delete()
+        self.assertTrue(
+            self.image_model.image.storage.exists(self.image_model.image.name)
+        )
+
+    @override_settings(IMAGES_THUMBNAILS=[('50x50', {'crop': 'center'}), ('x20', {})])
+    def test_generate_thumbnails(self):
+        call_command('generate_thumbnails', workers=1, stdout=StringIO())
+        # both thumbnails, the source and the thumbnails list of the source
+        self.assertEqual(4, KVStore.objects.count())
+        with self.assertNumQueries(0):
+            get_thumbnail(self.image_model.image.name, '50x50', crop='center')
+
+    @override_settings(IMAGES_THUMBNAILS=[('50x50', {'crop': 'center'})])
+    def test_generate_thumbnails_skip_broken(self):
+        broken = Image.objects.create(model=self.page, slug='broken')
+        Image.objects.filter(id=broken.id).update(image='images/broken.jpg')
+        get_original = default.backend.get_thumbnail
+
+        def get_thumbnail_or_fail(name, *args, **kwargs):
+            if name == 'images/broken.jpg':
+                raise OSError('cannot identify image file')
+            return get_original(name, *args, **kwargs)
+
+        out = StringIO()
+        with mock.patch.object(default.backend, 'get_thumbnail', get_thumbnail_or_fail):
+            with self.assertLogs('images.thumbnails') as logs:
+                call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn(str(broken.id), logs.output[0])
+        self.assertIn('Skipped 1 broken images', out.getvalue())
+        with self.assertNumQueries(0):
+            get_thumbnail(self.image_model.image.name, '50x50', crop='center')
+
+    def test_write_kvstore_updates_in_bulk(self):
+        KVStore.objects.bulk_create([
+            KVStore(key=f'sorl-thumbnail||image||{i}', value='{}') for i in range(3)
+        ])
+        with self.assertNumQueries(2):
+            write_kvstore({f'sorl-thumbnail||image||{i}': f'{{"size": {i}}}' for i in range(3)})
+        self.assertEqual(
+            ['{"size": 0}', '{"size": 1}', '{"size": 2}'],
+            list(KVStore.objects.order_by('key').values_list('value', flat=True)),
+        )
+
+    @override_settings(IMAGES_THUMBNAILS=[('50x50', {})])
+    def test_generate_thumbnails_dry_run(self):
+        out = StringIO()
+        call_command(
+            'generate_thumbnails', from_id=self.image_model.id, dry_run=True, stdout=out,
+        )
+        self.assertIn('1 thumbnails to generate', out.getvalue())
+        self.assertFalse(KVStore.objects.exists())
+
     def test_file_name(self):
         """ImageField should generate filename based on file's content hash."""
 
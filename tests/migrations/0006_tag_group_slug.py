@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 06:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from catalog.models import TagGroup
+
+
+def fill_slugs(apps, schema_editor):
+    MockTagGroup = apps.get_model('tests', 'MockTagGroup')
+    for group in MockTagGroup.objects.filter(slug='').only('id', 'name'):
+        MockTagGroup.objects.filter(id=group.id).update(slug=TagGroup.get_slug(group.name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0005_product_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktaggroup',
+            name='slug',
+            field=models.SlugField(blank=True, editable=False, max_length=25),
+        ),
+        migrations.RunPython(fill_slugs, migrations.RunPython.noop),
+    ]
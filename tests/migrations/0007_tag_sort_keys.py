@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 06:16
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from catalog.models import fill_tags_sort_keys
+
+
+def fill_sort_keys(apps, schema_editor):
+    fill_tags_sort_keys(apps.get_model('tests', 'MockTag').objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0006_tag_group_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktag',
+            name='sort_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='mocktag',
+            name='sort_value',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_sort_keys, migrations.RunPython.noop),
+    ]
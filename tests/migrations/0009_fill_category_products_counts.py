@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from catalog.counts import ProductsCounts
+
+
+def fill_counts(apps, schema_editor):
+    for category_model, product_model in [
+        ('MockCategory', 'MockProduct'),
+        ('MockEcommerceCategory', 'MockEcommerceProduct'),
+    ]:
+        ProductsCounts(
+            apps.get_model('tests', category_model),
+            apps.get_model('tests', product_model),
+        ).recount()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0008_category_products_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from pages.breadcrumbs import get_breadcrumbs
+from pages.models import CustomPage, FlatPage
+
+
+class Breadcrumbs(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.index = CustomPage.objects.create(name='Index', slug='')
+        # section -> page and its sibling, inactive sibling
+        self.section = FlatPage.objects.create(slug='section')
+        self.page = FlatPage.objects.create(slug='page', parent=self.section)
+        self.sibling = FlatPage.objects.create(slug='sibling', parent=self.section)
+        FlatPage.objects.create(slug='inactive', parent=self.section, is_active=False)
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def test_chain(self):
+        self.assertEqual(
+            [self.index, self.section, self.page],
+            [crumb.model for crumb in get_breadcrumbs(self.page)],
+        )
+
+    def test_siblings(self):
+        crumbs = get_breadcrumbs(self.page, with_siblings=True)
+        self.assertEqual(
+            [[], [], [self.sibling]],
+            [list(crumb.siblings) for crumb in crumbs],
+        )
+
+    def test_cached_chain(self):
+        get_breadcrumbs(self.page, with_siblings=True)
+        with self.assertNumQueries(0):
+            crumbs = get_breadcrumbs(self.page, with_siblings=True)
+            self.assertEqual('/section/page/', crumbs[-1].model.url)
+            self.assertEqual([self.sibling], crumbs[-1].siblings)
+
+    @override_settings(PAGES_CACHE_TIMEOUT=0)
+    def test_expire_chain(self):
+        get_breadcrumbs(self.page)
+        with self.assertNumQueries(1):
+            get_breadcrumbs(self.page)
+
+    def test_renew_on_edits(self):
+        get_breadcrumbs(self.page)
+        self.section.menu_title = 'New title'
+        self.section.save()
+        self.assertEqual(
+            'New title',
+            get_breadcrumbs(self.page)[1].model.display_menu_title,
+        )
+
+    def test_keep_on_not_tree_edits(self):
+        get_breadcrumbs(self.page)
+        section = FlatPage.objects.get(id=self.section.id)
+        section.seo_text = 'New text'
+        section.save()
+        with self.assertNumQueries(0):
+            get_breadcrumbs(self.page)
+
+    def test_template_tag(self):
+        template = Template('{% load pages_extras %}{% breadcrumbs_with_siblings page %}')
+        template.render(Context({'page': self.page}))
+        with self.assertNumQueries(0):
+            html = template.render(Context({'page': self.page}))
+        self.assertIn(self.section.url, html)
+        self.assertIn(self.sibling.url, html)
@@ -1,6 +1,8 @@
+from django.core.cache import cache
 from django.test import TestCase
 
 from pages import display, models
+from pages.cache import display_version
 
 
 class Fields(TestCase):
@@ -82,3 +84,36 @@ class Page(TestCase):
         left.display, right.display = {'tag': 'A'}, {'tag': 'A'}
 
         self.assertNotEqual(left.display.h1, right.display.h1)
+
+    def test_cached_fields(self):
+        cache.clear()
+        template = models.PageTemplate.objects.create(name='test', h1='{{ page.name }}')
+        page = models.Page.objects.create(name='page', template=template)
+        page.display = {display.CACHE_KEY: 'tags'}
+        self.assertEqual('page', page.display.h1)
+
+        page = models.Page.objects.get(id=page.id)
+        page.display = {display.CACHE_KEY: 'tags'}
+        with self.assertNumQueries(0):
+            self.assertEqual('page', page.display.h1)
+
+        page.name = 'renamed page'
+        page.save()
+        self.assertEqual('renamed page', page.display.h1)
+
+    def test_keep_cached_fields_on_other_pages_edits(self):
+        cache.clear()
+        template = models.PageTemplate.objects.create(name='test', h1='{{ page.name }}')
+        models.Page.objects.create(name='page', template=template)
+        version = display_version.value()
+
+        plain = models.Page.objects.create(name='plain page')
+        plain.name = 'renamed plain page'
+        plain.save()
+        self.assertEqual(version, display_version.value())
+
+        template = models.PageTemplate.objects.get(id=template.id)
+        # the update only, no query for the saved state
+        with self.assertNumQueries(1):
+            template.save()
+        self.assertEqual(version, display_version.value())
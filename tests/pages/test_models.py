@@ -1,6 +1,12 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from pages.models import ModelPage, CustomPage, FlatPage, Page
+from pages.models import (
+    ModelPage, CustomPage, FlatPage, Page, PageTemplate, render_pages_fields,
+)
+from pages.utils import compiled_templates
 from tests.models import MockEntity, MockEntityWithSync
 
 
@@ -243,3 +249,107 @@ class TestPageMixin(TestCase):
         
     def test_default_parent(self):
         self.assertEqual(self.entity.page.parent, self.default_parent)
+
+
+class TestUrlPath(TestCase):
+
+    def setUp(self):
+        self.default_parent = CustomPage.objects.create(slug='catalog')
+        self.root = FlatPage.objects.create(slug='root')
+        self.child = FlatPage.objects.create(slug='child', parent=self.root)
+        self.grandchild = FlatPage.objects.create(slug='grandchild', parent=self.child)
+
+    def get_url_paths(self):
+        return [
+            Page.objects.get(id=page.id).url_path
+            for page in [self.root, self.child, self.grandchild]
+        ]
+
+    def test_store_url_path(self):
+        self.assertEqual(
+            ['/root/', '/root/child/', '/root/child/grandchild/'],
+            self.get_url_paths(),
+        )
+
+    def test_url_without_queries(self):
+        page = Page.objects.get(id=self.grandchild.id)
+        with self.assertNumQueries(0):
+            self.assertEqual('/root/child/grandchild/', page.url)
+
+    def test_update_subtree_on_slug_change(self):
+        self.root.slug = 'new-root'
+        self.root.save()
+        self.assertEqual(
+            ['/new-root/', '/new-root/child/', '/new-root/child/grandchild/'],
+            self.get_url_paths(),
+        )
+
+    def test_update_subtree_on_activity_change(self):
+        self.child.is_active = False
+        self.child.save()
+        self.assertEqual('/root/grandchild/', self.get_url_paths()[2])
+
+    def test_update_subtree_on_parent_change(self):
+        other_root = FlatPage.objects.create(slug='other-root')
+        self.child.parent = other_root
+        self.child.save()
+        self.assertEqual(
+            ['/root/', '/other-root/child/', '/other-root/child/grandchild/'],
+            self.get_url_paths(),
+        )
+
+    def test_store_model_url(self):
+        entity = create_instance(with_sync=False, name='Entity', slug='entity-url')
+        entity.page = ModelPage.objects.create(name='Entity')
+        entity.save()
+        self.assertEqual('entity-url', Page.objects.get(id=entity.page.id).url_path)
+
+        entity.slug = 'new-entity-url'
+        entity.save()
+        self.assertEqual('new-entity-url', Page.objects.get(id=entity.page.id).url_path)
+
+    def test_backfill_url_paths(self):
+        entity = create_instance(name='Entity')
+        Page.objects.update(url_path='')
+        call_command('backfill_url_paths', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            ['/root/', '/root/child/', '/root/child/grandchild/'],
+            self.get_url_paths(),
+        )
+        self.assertEqual('/so-mock-wow/', Page.objects.get(id=entity.page.id).url_path)
+
+
+class TestRenderPages(TestCase):
+
+    def setUp(self):
+        self.template = PageTemplate.objects.create(
+            name='Listing', title='{{ page.name }} title', h1='{{ page.name }} h1',
+        )
+        self.pages = [
+            Page.objects.create(name=f'Page {i}', template=self.template)
+            for i in range(3)
+        ]
+        self.plain_page = Page.objects.create(name='Plain', title='Plain title')
+
+    def test_render_pages(self):
+        rendered = self.template.render_pages(self.pages, fields=['title'])
+        self.assertEqual(
+            {page.id: {'title': f'{page.name} title'} for page in self.pages},
+            rendered,
+        )
+
+    def test_compile_once(self):
+        compiled_templates.clear()
+        self.template.render_pages(self.pages)
+        # title, h1 and the empty source of other fields
+        self.assertEqual(3, compiled_templates.misses)
+
+    def test_render_pages_fields(self):
+        pages = list(Page.objects.filter(id__in=[p.id for p in [*self.pages, self.plain_page]]))
+        # one query for all the templates
+        with self.assertNumQueries(1):
+            render_pages_fields(pages)
+            self.assertEqual(
+                ['Page 0 title', 'Page 1 title', 'Page 2 title', 'Plain title'],
+                [page.display_title for page in pages],
+            )
@@ -0,0 +1,68 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from pages.models import FlatPage, ModelPage, Page
+from pages.sitemap import iter_urls, write_sitemaps
+
+
+class Sitemap(TestCase):
+
+    def setUp(self):
+        self.pages = [FlatPage.objects.create(slug=f'page-{i}') for i in range(5)]
+        FlatPage.objects.create(slug='inactive', is_active=False)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def read(self, name):
+        path = os.path.join(self.directory.name, name)
+        with (gzip.open if name.endswith('.gz') else open)(path, 'rt') as file:
+            return file.read()
+
+    def test_iter_urls_with_one_query(self):
+        with self.assertNumQueries(1):
+            paths = [url.path for url in iter_urls(chunk_size=2)]
+        self.assertEqual([page.url for page in self.pages], paths)
+
+    def test_resolve_not_stored_urls(self):
+        Page.objects.filter(id=self.pages[0].id).update(url_path='')
+        self.assertEqual('/page-0/', next(iter_urls()).path)
+
+    def test_skip_model_pages_without_entities(self):
+        ModelPage.objects.create(name='No entity', related_model_name='tests_mockentity')
+        self.assertEqual(
+            [page.url for page in self.pages],
+            [url.path for url in iter_urls()],
+        )
+
+    def test_split_by_max_urls(self):
+        names = write_sitemaps(self.directory.name, 'http://example.com/', iter_urls(), max_urls=2)
+        self.assertEqual(
+            ['sitemap-1.xml.gz', 'sitemap-2.xml.gz', 'sitemap-3.xml.gz', 'sitemap.xml'],
+            names,
+        )
+        self.assertIn('<loc>http://example.com/sitemap-3.xml.gz</loc>', self.read('sitemap.xml'))
+        self.assertIn('<loc>http://example.com/page-4/</loc>', self.read('sitemap-3.xml.gz'))
+        self.assertNotIn('inactive', self.read('sitemap-3.xml.gz'))
+
+    def test_remove_stale_sitemaps(self):
+        write_sitemaps(self.directory.name, 'http://example.com', iter_urls(), max_urls=2)
+        write_sitemaps(self.directory.name, 'http://example.com', iter_urls(), max_urls=5)
+        self.assertEqual(
+            ['sitemap-1.xml.gz', 'sitemap.xml'],
+            sorted(os.listdir(self.directory.name)),
+        )
+
+    def test_command(self):
+        call_command(
+            'generate_sitemap', directory=self.directory.name,
+            base_url='http://example.com', stdout=StringIO(),
+        )
+        self.assertEqual(5, self.read('sitemap-1.xml.gz').count('<url>'))
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from pages.models import CustomPage, FlatPage
+from pages.templatetags.pages_extras import accordion
+
+
+class Accordion(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.section = FlatPage.objects.create(slug='section', position=1)
+        self.pages = [
+            FlatPage.objects.create(slug=f'page-{i}', parent=self.section, position=i)
+            for i in range(3)
+        ]
+        self.other_section = FlatPage.objects.create(slug='other-section', position=0)
+        FlatPage.objects.create(slug='inactive-section', is_active=False)
+        catalog = CustomPage.objects.create(slug='catalog')
+        FlatPage.objects.create(slug='custom-child', parent=catalog)
+
+    def tearDown(self):
+        cache.clear()
+        super().tearDown()
+
+    def test_sections(self):
+        with self.assertNumQueries(1):
+            sections = accordion(links_per_item=2)['sections']
+        self.assertEqual([self.other_section, self.section], sections)
+        self.assertEqual([], sections[0].pages)
+        self.assertEqual(self.pages[:2], sections[1].pages)
+
+    def test_cached_sections(self):
+        template = Template('{% load pages_extras %}{% accordion %}')
+        template.render(Context())
+        with self.assertNumQueries(0):
+            html = template.render(Context())
+        self.assertIn(self.pages[0].url, html)
+
+    @override_settings(PAGES_CACHE_TIMEOUT=0)
+    def test_expire_sections(self):
+        accordion()
+        with self.assertNumQueries(1):
+            accordion()
+
+    def test_renew_on_edits(self):
+        accordion()
+        self.pages[0].delete()
+        self.assertEqual(self.pages[1:], accordion()['sections'][1].pages)
@@ -0,0 +1,30 @@
+from django.test import TestCase
+
+from pages.utils import CompiledTemplates, compiled_templates, render_str
+
+
+class CompiledTemplatesCache(TestCase):
+
+    def setUp(self):
+        self.templates = CompiledTemplates(size=2)
+
+    def test_reuse_compiled_template(self):
+        template = self.templates.get('{{ page }}')
+        self.assertIs(template, self.templates.get('{{ page }}'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1}, self.templates.stats())
+
+    def test_evict_least_recently_used(self):
+        first = self.templates.get('first')
+        self.templates.get('second')
+        self.templates.get('first')
+        self.templates.get('third')
+        self.assertEqual(2, len(self.templates))
+        self.assertIs(first, self.templates.get('first'))
+        self.templates.get('second')
+        self.assertEqual(4, self.templates.misses)
+
+    def test_render_str(self):
+        compiled_templates.clear()
+        for name in ['first', 'second']:
+            self.assertEqual(name, render_str('{{ name }}', {'name': name}))
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1}, compiled_templates.stats())
@@ -1,9 +1,10 @@
 from django.conf import settings
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 
 from pages.models import FlatPage, CustomPage
 from pages.utils import save_custom_pages
+from pages.views import FlatPageView
 
 
 class PageTests(TestCase):
@@ -104,6 +105,29 @@ class PageTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
 
+    def test_deep_page_redirect_query(self):
+        """Deep page is resolved by one query regardless of its depth."""
+        page = self.page_default_contacts
+        for slug in ['level-one', 'level-two']:
+            page = FlatPage.objects.create(slug=slug, parent=page)
+
+        with self.assertNumQueries(1):
+            found = FlatPageView().get_page(('level-two', ))
+            self.assertEqual(page, found)
+            request = RequestFactory().get('/level-two/')
+            self.assertFalse(FlatPageView().is_full_path(request, found))
+
+        response = self.client.get('/level-two/')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response.url, page.url)
+
+    def test_page_without_url_path(self):
+        """Page without stored url path is resolved as before."""
+        page = self.page_default_contacts
+        FlatPage.objects.filter(id=page.id).update(url_path='')
+        self.assertEqual(self.client.get('/navigation/contacts/').status_code, 200)
+        self.assertEqual(self.client.get('/news/contacts/').status_code, 404)
+
     def test_page_crumbs(self):
         """Default page has valid crumbs list"""
         page = self.page_default_contacts
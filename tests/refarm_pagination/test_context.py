@@ -1,9 +1,12 @@
+import json
+from base64 import urlsafe_b64encode
 from contextlib import contextmanager
 from unittest import mock
 
 from django.conf import settings
-from django.test import TestCase
-from refarm_pagination.context import PaginationContext
+from django.http import Http404
+from django.test import TestCase, override_settings
+from refarm_pagination.context import KeysetPaginationContext, PaginationContext
 
 from tests.catalog.models import MockProduct
 
@@ -61,3 +64,42 @@ class TestPaginationContext(TestCase):
             self.context(per_page=per_page, number=number)['showed_count'],
             number * per_page,
         )
+
+    def test_single_count(self):
+        """Context counts objects once and fetches the page objects once."""
+        with self.assertNumQueries(2):
+            context = self.context(per_page=3)
+        self.assertEqual(MockProduct.objects.count(), context['total_products'])
+
+    def test_ready_count(self):
+        with self.assertNumQueries(1):
+            context = self.context(per_page=3, count=100)
+        self.assertEqual(100, context['total_products'])
+
+
+@override_settings(CATEGORY_SORTING_OPTIONS={
+    0: {'label': 'Cheapest', 'field': 'price', 'direction': ''},
+    1: {'label': 'Newest', 'field': 'page__date_published', 'direction': '-'},
+})
+class TestKeysetPaginationContext(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def context(self, value, sorting_index=0):
+        cursor = urlsafe_b64encode(json.dumps([value, 1]).encode()).decode()
+        return KeysetPaginationContext(
+            '', 1, MockProduct.objects.all(), sorting_index=sorting_index, after=cursor,
+        ).context()
+
+    def test_valid_cursor(self):
+        self.assertEqual(1, len(self.context(0)['page'].object_list))
+        self.assertEqual(
+            1, len(self.context('2100-01-01', sorting_index=1)['page'].object_list),
+        )
+
+    def test_tampered_cursor_404(self):
+        for value, sorting_index in [
+            ('cheap', 0), ([1], 0), ({'price': 1}, 0), ('not a date', 1),
+        ]:
+            with self.subTest(value=value), self.assertRaises(Http404):
+                self.context(value, sorting_index)
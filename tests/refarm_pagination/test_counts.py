@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from refarm_pagination import counts
+from refarm_pagination.context import PaginationContext
+from refarm_pagination.pagination import Paginator
+from tests.catalog.models import MockProduct
+
+
+class ApproximateCount(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def test_exact_below_threshold(self):
+        count = counts.approximate_count(
+            MockProduct.objects.all(), estimate=lambda _: 5, threshold=10,
+        )
+        self.assertEqual(
+            counts.Count(MockProduct.objects.count(), is_approximate=False),
+            count,
+        )
+
+    def test_estimate_above_threshold(self):
+        with self.assertNumQueries(0):
+            count = counts.approximate_count(
+                MockProduct.objects.all(), estimate=lambda _: 12000, threshold=10,
+            )
+        self.assertEqual(counts.Count(12000, is_approximate=True), count)
+
+    def test_unknown_estimate(self):
+        """Databases without the planner estimate give the exact count."""
+        count = counts.approximate_count(
+            MockProduct.objects.all(), estimate=lambda _: None, threshold=0,
+        )
+        self.assertFalse(count.is_approximate)
+
+    def test_approximate_paginator_pages(self):
+        """Paginator gives real pages beyond the underestimated count."""
+        products = MockProduct.objects.order_by('id')
+        paginator = Paginator(products, 2, count=2, is_approximate=True)
+        self.assertEqual(list(products[2:4]), list(paginator.page(2)))
+        with self.assertRaises(Http404):
+            paginator.page(products.count())
+
+    def test_approximate_page_has_next(self):
+        """Next pages are known from the objects, not from the approximate count."""
+        products = MockProduct.objects.order_by('id')
+        total = products.count()
+        underestimated = Paginator(products, 2, count=2, is_approximate=True)
+        self.assertTrue(underestimated.page(1).has_next())
+        self.assertEqual(2, underestimated.page(1).next_page_number())
+
+        overestimated = Paginator(products, 2, count=total * 10, is_approximate=True)
+        last = overestimated.page((total + 1) // 2)
+        self.assertFalse(last.has_next())
+        self.assertEqual(total, last.end_index())
+
+    @override_settings(PAGINATION_NEIGHBORS=10)
+    def test_approximate_neighbor_links(self):
+        """Links lead to the existing pages only."""
+        context = PaginationContext(
+            '/catalog/', 2, 2, MockProduct.objects.order_by('id'),
+            count=MockProduct.objects.count() * 10, is_approximate=True,
+        ).context()
+        self.assertEqual([1], [number for number, _ in context['prev_pairs']])
+        self.assertEqual([3], [number for number, _ in context['next_pairs']])
+
+    def test_planner_estimate(self):
+        self.assertIsNone(counts.planner_estimate(MockProduct.objects.all()))
+
+        connection = mock.MagicMock(vendor='postgresql')
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = [[{'Plan': {'Plan Rows': 12000}}]]
+        with mock.patch.object(counts, 'connections', {'default': connection}):
+            self.assertEqual(12000, counts.planner_estimate(MockProduct.objects.all()))
+        self.assertIn('EXPLAIN (FORMAT JSON)', cursor.execute.call_args[0][0])
@@ -1,9 +1,11 @@
 from django.conf import settings
+from django.core.cache import cache
 from django.core import paginator
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.http import Http404
 
 from refarm_pagination import pagination
+from tests.catalog.models import MockProduct
 
 
 class Paginator(TestCase):
@@ -67,3 +69,76 @@ class NeighborPages(TestCase):
             settings.PAGINATION_NEIGHBORS,
             len(neighbors.prev_neighbors() + neighbors.next_neighbors()),
         )
+
+
+@override_settings(CATEGORY_SORTING_OPTIONS={
+    0: {'label': 'Cheapest', 'field': 'price', 'direction': ''},
+    1: {'label': 'Most expensive', 'field': 'price', 'direction': '-'},
+})
+class KeysetPaginator(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def paginator(self, sorting_index=0):
+        return pagination.KeysetPaginator.from_sorting(
+            MockProduct.objects.all(), per_page=7, sorting_index=sorting_index,
+        )
+
+    def forward_pages(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(after=pages[-1].next_cursor()))
+        return pages
+
+    def assert_pages(self, pages, *ordering):
+        self.assertEqual(
+            list(MockProduct.objects.order_by(*ordering)),
+            [product for page in pages for product in page],
+        )
+
+    def test_forward(self):
+        pages = self.forward_pages(self.paginator())
+        self.assertGreater(len(pages), 2)
+        self.assertFalse(pages[0].has_previous())
+        self.assert_pages(pages, 'price', 'id')
+
+    def test_descending(self):
+        self.assert_pages(self.forward_pages(self.paginator(sorting_index=1)), '-price', '-id')
+
+    def test_backward(self):
+        paginator = self.paginator()
+        forward = self.forward_pages(paginator)
+        backward = [forward[-1]]
+        while backward[-1].has_previous():
+            backward.append(paginator.page(before=backward[-1].previous_cursor()))
+
+        self.assertEqual(
+            [list(page) for page in forward],
+            [list(page) for page in backward[::-1]],
+        )
+
+    def test_page_queries(self):
+        """Page costs one query without count."""
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor()
+        with self.assertNumQueries(1):
+            paginator.page(after=cursor).next_url('/catalog/')
+
+    def test_wrong_cursor_404(self):
+        with self.assertRaises(Http404):
+            self.paginator().page(after='wrong')
+
+
+class CachedCount(TestCase):
+
+    fixtures = ['catalog.json']
+
+    def test_count_once(self):
+        cache.clear()
+        count = MockProduct.objects.count()
+        with self.assertNumQueries(1):
+            for _ in range(2):
+                self.assertEqual(
+                    count,
+                    pagination.cached_count(MockProduct.objects.all(), 'products_count'),
+                )
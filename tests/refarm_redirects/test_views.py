@@ -5,9 +5,16 @@ from django.contrib.sites.models import Site
 from django.db.utils import IntegrityError
 from django.test import TestCase
 
+from refarm_redirects.redirects import tables
+
 
 class Redirects(TestCase):
 
+    def tearDown(self):
+        # db rollback doesn't send signals, so drop the tables explicitly
+        tables.invalidate()
+        super().tearDown()
+
     def test_redirect_from_existing_page(self):
         """`refarm-site.redirects` app should redirect from existing url too."""
         # take some existing `url_from`
@@ -27,6 +34,39 @@ class Redirects(TestCase):
         response = self.client.get(url_from)
         self.assertEqual(response.status_code, 301)
 
+    def test_redirect_table_invalidation(self):
+        """Redirects changes should be applied without the process restart."""
+        url_from = '/catalog/categories/category-0/tags/6-v/'
+        url_to = '/catalog/categories/category-0/'
+        site = Site.objects.first()
+        tables.get(site.id)  # warm up the table
+
+        # test transactions are never committed, so collect on commit callbacks
+        on_commit = []
+        with unittest.mock.patch('django.db.transaction.on_commit', on_commit.append):
+            redirect = Redirect.objects.create(site=site, old_path=url_from, new_path=url_to)
+            # the table is renewed only after the commit
+            self.assertIsNone(tables.get(site.id).get(url_from))
+            on_commit.pop()()
+            self.assertEqual(url_to, tables.get(site.id).get(url_from))
+
+            redirect.delete()
+            on_commit.pop()()
+            self.assertIsNone(tables.get(site.id).get(url_from))
+
+    def test_response_without_redirect_queries(self):
+        """Warmed up redirect table should not hit db."""
+        site = Site.objects.first()
+        tables.get(site.id)  # warm up the table
+        with self.assertNumQueries(0):
+            self.assertIsNone(tables.get(site.id).get('/some/page/'))
+
+    def test_gone_redirect(self):
+        """Redirect to an empty path should respond with 410 status."""
+        url_from = '/catalog/categories/category-0/tags/6-v/'
+        Redirect.objects.create(site=Site.objects.first(), old_path=url_from, new_path='')
+        self.assertEqual(self.client.get(url_from).status_code, 410)
+
     # @todo #360:60m Add db constraint for looped redirect.
     #  Example of looped redirect:
     #  `/news/one-two/ --> /news/one-two/`